@@ -1,26 +1,27 @@
-import heapq # For priority queue in A*
+import functools
+import weakref
 import numpy as np
+from bucket_pq import BucketPQ # Integer-priority queue for A* on the unit-cost grid
 from environment import CooperativeChickenEnv # Assuming environment.py is in the same directory
+from episode_history import EpisodeHistory
 
-def _manhattan_distance(pos1, pos2):
-    """Helper function to calculate Manhattan distance."""
-    return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
+try:
+    from astar_core import astar_first_action # Cython core, built with `cythonize -i astar_core.pyx`
+except ImportError: # Extension not compiled, fall back to numba or pure Python below
+    astar_first_action = None
 
-class Node:
-    """Node class for A* search."""
-    def __init__(self, position, parent=None, action_from_parent=None):
-        self.position = position
-        self.parent = parent
-        self.action_from_parent = action_from_parent # The action that led to this node
-        self.g = 0  # Cost from start to current node
-        self.h = 0  # Heuristic cost from current node to goal
-        self.f = 0  # Total cost (g + h)
+try:
+    from a_star_agents_numba import _astar_numba
+except ImportError: # numba not installed, a_star_search uses the pure-Python implementation
+    _astar_numba = None
 
-    def __lt__(self, other): # For priority queue comparison
-        return self.f < other.f
+# (action, dr, dc) rows for the compiled search
+_NEIGHBOR_DELTAS_ARR = np.array(CooperativeChickenEnv._NEIGHBOR_DELTAS, dtype=np.int8)
 
-    def __eq__(self, other): # For checking if a node is in a list/set
-        return self.position == other.position
+# env._grid_key -> an environment with that grid layout, so the cached search can stay keyed on hashables.
+# Weak values: the registry must not keep discarded environments (and their tables) alive. a_star_search
+# registers the caller's env before every cached lookup, so a live env is always present when needed.
+_ENV_REGISTRY = weakref.WeakValueDictionary()
 
 def a_star_search(start_pos, goal_pos, env):
     """
@@ -33,66 +34,108 @@ def a_star_search(start_pos, goal_pos, env):
         int: The first action (from env.ACTION_DELTAS) to take on the optimal path.
              Returns ACTION_STAY if no path is found or if already at goal.
     """
-    start_node = Node(start_pos)
-    start_node.h = _manhattan_distance(start_pos, goal_pos)
-    start_node.f = start_node.h
+    if start_pos == goal_pos:
+        return env.ACTION_STAY # Already at goal, nothing to search
+
+    sr, sc = start_pos
+    gr, gc = goal_pos
+    if not env._wall_mask[min(sr, gr) + 1:max(sr, gr) + 2, min(sc, gc) + 1:max(sc, gc) + 2].any():
+        # No wall inside the bounding rectangle: every monotone path is optimal, so no search is needed.
+        # Step along the axis with the larger remaining delta.
+        dr, dc = gr - sr, gc - sc # Not both zero, start_pos == goal_pos returned above
+        if abs(dr) >= abs(dc):
+            return env.ACTION_SOUTH if dr > 0 else env.ACTION_NORTH
+        return env.ACTION_EAST if dc > 0 else env.ACTION_WEST
+
+    grid_key = env._grid_key
+    _ENV_REGISTRY.setdefault(grid_key, env)
+    return _cached_astar(tuple(start_pos), tuple(goal_pos), grid_key)
+
+@functools.lru_cache(maxsize=4096)
+def _cached_astar(start_pos, goal_pos, grid_key):
+    """
+    Memoized first action keyed by (start, goal, grid layout). Walls are fixed per grid,
+    so the result only depends on these three and stays valid across episodes.
+    """
+    return _astar_core(start_pos, goal_pos, _ENV_REGISTRY[grid_key])
+
+def _astar_core(start_pos, goal_pos, env):
+    """Uncached search: the Cython core if built, else the numba core if available, else pure Python."""
+    if astar_first_action is not None:
+        action = astar_first_action(env._wall_mask, start_pos[0], start_pos[1], goal_pos[0], goal_pos[1],
+                                    env.L, env.H)
+        return env.ACTION_STAY if action < 0 else action
+    if _astar_numba is not None:
+        action = _astar_numba(env._wall_mask, start_pos[0], start_pos[1], goal_pos[0], goal_pos[1],
+                              _NEIGHBOR_DELTAS_ARR)
+        return env.ACTION_STAY if action < 0 else int(action)
+    return _a_star_search_py(start_pos, goal_pos, env)
+
+def _a_star_search_py(start_pos, goal_pos, env):
+    """Pure-Python A* used when numba is unavailable. Same contract as a_star_search."""
+    H = env.H
+    start = start_pos[0] * H + start_pos[1]
+    goal = goal_pos[0] * H + goal_pos[1]
+    goal_r, goal_c = goal_pos
+    neighbors = env._neighbors # Precomputed valid (action, neighbor) pairs per flat position
+
+    # Search state is kept as parallel arrays on the env, indexed by flat position.
+    # Bumping the epoch invalidates every entry from previous searches at once.
+    g_score = env._astar_g
+    gen = env._astar_gen
+    first_act = env._astar_first_act
+    if env._astar_epoch == np.iinfo(np.int32).max:
+        gen.fill(0)
+        env._astar_epoch = 0
+    env._astar_epoch += 1
+    epoch = env._astar_epoch
+
+    gen[start] = epoch
+    g_score[start] = 0
+    first_act[start] = env.ACTION_STAY
+    open_list = BucketPQ(2 * (env.L + env.H)) # f-scores are small integers; the queue grows if a detour needs more
+    # Manhattan distance as the heuristic, computed inline: a tighter landmark bound saved too few
+    # expansions on these grids to pay for its extra per-push work in Python
+    open_list.push(abs(start_pos[0] - goal_r) + abs(start_pos[1] - goal_c), (0, start)) # (g, pos) payloads
 
-    open_list = []
-    heapq.heappush(open_list, start_node)
-    closed_set = set()
+    while open_list:
+        _, (g, pos) = open_list.pop()
 
-    action_map = {v: k for k, v in env.ACTION_DELTAS.items()} # (dr, dc) -> action_id
+        # Stale entry: a cheaper path to this position was pushed after this one (lazy deletion)
+        if g > g_score[pos]:
+            continue
 
-    while open_list:
-        current_node = heapq.heappop(open_list)
-
-        if current_node.position == goal_pos:
-            # Reconstruct path to find the first action
-            path = []
-            temp = current_node
-            while temp.parent is not None:
-                path.append(temp.action_from_parent)
-                temp = temp.parent
-            if not path: # Already at goal or only one step was needed
-                if current_node.action_from_parent is not None:
-                    return current_node.action_from_parent
-                return env.ACTION_STAY # Already at goal, or only option is to stay
-            return path[-1] # The first action taken from start_node
-
-        closed_set.add(current_node.position)
-
-        for action_val, (dr, dc) in env.ACTION_DELTAS.items():
-            neighbor_pos = (current_node.position[0] + dr, current_node.position[1] + dc)
-
-            if not env._is_valid_pos(neighbor_pos[0], neighbor_pos[1]): # Check if valid (not wall, in bounds)
-                continue
-            if neighbor_pos in closed_set:
+        if pos == goal:
+            return int(first_act[pos]) # ACTION_STAY if start is already the goal
+
+        tentative_g = g + 1 # Cost of each step is 1
+        for action_val, neighbor in neighbors[pos]:
+            if gen[neighbor] == epoch and tentative_g >= g_score[neighbor]: # Not an improvement
                 continue
+            gen[neighbor] = epoch
+            g_score[neighbor] = tentative_g
+            # Carry the first step of the path forward instead of storing parents to walk back later
+            first_act[neighbor] = action_val if pos == start else first_act[pos]
+            nr, nc = divmod(neighbor, H)
+            open_list.push(tentative_g + abs(nr - goal_r) + abs(nc - goal_c), (tentative_g, neighbor))
 
-            neighbor_node = Node(neighbor_pos, current_node, action_val)
-            neighbor_node.g = current_node.g + 1 # Cost of each step is 1
-            neighbor_node.h = _manhattan_distance(neighbor_pos, goal_pos)
-            neighbor_node.f = neighbor_node.g + neighbor_node.h
-
-            # Check if neighbor is in open_list and if this path is better
-            found_in_open = False
-            for i, open_node in enumerate(open_list):
-                if open_node == neighbor_node:
-                    found_in_open = True
-                    if neighbor_node.g < open_node.g:
-                        open_list[i] = neighbor_node # Update with better path
-                        heapq.heapify(open_list) # Re-sort
-                    break
-            
-            if not found_in_open:
-                heapq.heappush(open_list, neighbor_node)
-                
     return env.ACTION_STAY # No path found, stay put
 
 
-def run_a_star_agents_episode(env, render_episode_to_console=False):
+def run_a_star_agents_episode(env, render_episode_to_console=False, log_history=True):
     """
     Runs a single episode with two A* agents.
+
+    Args:
+        env: An instance of the CooperativeChickenEnv.
+        render_episode_to_console (bool): Whether to print the state of the environment to console.
+        log_history (bool): Whether to record the per-step history. Disable for evaluation runs that only
+                            need rewards and lengths.
+
+    Returns:
+        tuple: (total_reward_agent1, total_reward_agent2, episode_length, history_log)
+               history_log is an EpisodeHistory (None if log_history is False);
+               history_log[i] is a dictionary detailing step i.
     """
     obs, info = env.reset()
     if render_episode_to_console:
@@ -101,23 +144,14 @@ def run_a_star_agents_episode(env, render_episode_to_console=False):
         print(f"Observation: {obs}")
         print(f"Info: {info}")
 
-    history_log = []
-    history_log.append({
-        'grid_render_str': env.render(),
-        'agent1_pos': env.agent1_pos,
-        'agent2_pos': env.agent2_pos,
-        'chicken_pos': env.chicken_pos,
-        'acting_agent': info.get("current_player_to_act", -1),
-        'action_taken': None,
-        'reward_received': 0,
-        'total_reward_agent1_so_far': 0,
-        'total_reward_agent2_so_far': 0,
-        'terminated': False,
-        'truncated': False,
-        'info': info.copy(),
-        'round_step': env.current_step_in_episode,
-        'L': env.L, 'H': env.H, 'walls': list(env.walls)
-    })
+    # Loop limit is needed up front: it bounds how many rows the history can hold
+    # (one per loop iteration plus the initial state).
+    max_loop_iters = env.max_episode_steps * 2 + 10 
+    history_log = EpisodeHistory(max_loop_iters + 1, env.L, env.H, tuple(env.walls)) if log_history else None
+    if log_history:
+        # Log initial state before any action
+        history_log.record(env, info.get("current_player_to_act", -1), None, 0, False, False,
+                           env.render() if render_episode_to_console else None)
 
     terminated = False
     truncated = False
@@ -125,7 +159,10 @@ def run_a_star_agents_episode(env, render_episode_to_console=False):
     total_reward_agent2 = 0
     
     current_loop_iter = 0
-    max_loop_iters = env.max_episode_steps * 2 + 10 
+
+    # Local names resolve faster than globals/attributes inside the loop
+    env_action_stay = env.ACTION_STAY
+    a_star = a_star_search
 
     while not terminated and not truncated and current_loop_iter < max_loop_iters:
         current_player_idx_before_step = info.get("current_player_to_act", -1)
@@ -137,9 +174,9 @@ def run_a_star_agents_episode(env, render_episode_to_console=False):
             chicken_pos = env.chicken_pos
             
             if agent_pos == chicken_pos: # Already on chicken, try to stay or best guess if forced to move
-                 action_taken_this_step = env.ACTION_STAY
+                 action_taken_this_step = env_action_stay
             else:
-                action_taken_this_step = a_star_search(agent_pos, chicken_pos, env)
+                action_taken_this_step = a_star(agent_pos, chicken_pos, env)
 
             if render_episode_to_console:
                 print(f"\n--- Round {env.current_step_in_episode + 1}, Agent {current_player_idx_before_step + 1} (A*) takes action: {action_taken_this_step} ---")
@@ -164,22 +201,9 @@ def run_a_star_agents_episode(env, render_episode_to_console=False):
                 print(f"\n--- Loop will exit. Current state: Terminated={terminated}, Truncated={truncated}, Info: {info} ---")
             break
 
-        history_log.append({
-            'grid_render_str': env.render(),
-            'agent1_pos': env.agent1_pos,
-            'agent2_pos': env.agent2_pos,
-            'chicken_pos': env.chicken_pos,
-            'acting_agent': current_player_idx_before_step,
-            'action_taken': action_taken_this_step,
-            'reward_received': reward_for_this_step,
-            'total_reward_agent1_so_far': total_reward_agent1,
-            'total_reward_agent2_so_far': total_reward_agent2,
-            'terminated': terminated,
-            'truncated': truncated,
-            'info': info.copy(),
-            'round_step': env.current_step_in_episode,
-            'L': env.L, 'H': env.H, 'walls': list(env.walls)
-        })
+        if log_history:
+            history_log.record(env, current_player_idx_before_step, action_taken_this_step, reward_for_this_step,
+                               terminated, truncated, env.render() if render_episode_to_console else None)
         
         current_loop_iter += 1
         if current_loop_iter >= max_loop_iters:
@@ -187,8 +211,8 @@ def run_a_star_agents_episode(env, render_episode_to_console=False):
                 print("Warning: Reached maximum loop iterations for the episode (A*).")
             if not terminated and not truncated:
                 truncated = True
-                history_log[-1]['truncated'] = True
-                if 'status' not in history_log[-1]['info']: history_log[-1]['info']['status'] = "max_loop_iters_reached"
+                if log_history:
+                    history_log.mark_truncated()
 
     final_episode_length = env.current_step_in_episode
     if render_episode_to_console:
@@ -226,6 +250,6 @@ if __name__ == '__main__':
             if key not in ['grid_render_str', 'walls']: print(f"  {key}: {val}")
 
     print("\nRunning one test episode with A* agents (console render ON)...")
-    test_env_render = CooperativeChickenEnv(**env_config)
-    r1_render, r2_render, length_render, history_render = run_a_star_agents_episode(test_env_render, render_episode_to_console=True)
+    r1_render, r2_render, length_render, _ = run_a_star_agents_episode(test_env, render_episode_to_console=True,
+                                                                       log_history=False) # Only the console output is used
     print(f"\nRendered episode finished. A1 Reward: {r1_render}, A2 Reward: {r2_render}, Length: {length_render} rounds.")
\ No newline at end of file
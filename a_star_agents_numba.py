@@ -0,0 +1,113 @@
+import numpy as np
+from numba import njit
+
+# Compiled A* core used by a_star_agents.a_star_search when numba is installed.
+# Positions are encoded as flat indices into the environment's sentinel-bordered wall mask
+# (cell (r, c) lives at (r+1) * W + (c+1) with W = H + 2), so neighbor probes need no bounds checks.
+
+@njit(cache=True)
+def _heap_push(heap, size, item):
+    """Pushes item onto the binary min-heap stored in heap[:size]. Returns the new size."""
+    i = size
+    heap[i] = item
+    while i > 0:
+        parent = (i - 1) >> 1
+        if heap[parent] <= heap[i]:
+            break
+        heap[parent], heap[i] = heap[i], heap[parent]
+        i = parent
+    return size + 1
+
+@njit(cache=True)
+def _heap_pop(heap, size):
+    """Pops the smallest item from the binary min-heap stored in heap[:size]. Returns (item, new size)."""
+    top = heap[0]
+    size -= 1
+    heap[0] = heap[size]
+    i = 0
+    while True:
+        left = 2 * i + 1
+        if left >= size:
+            break
+        child = left
+        if left + 1 < size and heap[left + 1] < heap[left]:
+            child = left + 1
+        if heap[i] <= heap[child]:
+            break
+        heap[i], heap[child] = heap[child], heap[i]
+        i = child
+    return top, size
+
+@njit(cache=True)
+def _astar_numba(mask, sr, sc, gr, gc, action_deltas):
+    """
+    A* search on the wall mask, returning the first action of an optimal path.
+    Args:
+        mask (np.ndarray): uint8 wall mask of shape (L+2, H+2) with a wall sentinel border.
+        sr, sc (int): Start position (r, c) in grid coordinates.
+        gr, gc (int): Goal position (r, c) in grid coordinates.
+        action_deltas (np.ndarray): int8 array of (action, dr, dc) rows for the moving actions.
+    Returns:
+        int: The first action id on the optimal path, or -1 if already at goal or no path exists.
+    """
+    W = mask.shape[1]
+    flat_mask = mask.ravel()
+    n = flat_mask.shape[0]
+    int32_max = np.iinfo(np.int32).max
+
+    start = (sr + 1) * W + (sc + 1)
+    goal = (gr + 1) * W + (gc + 1)
+    if start == goal:
+        return -1
+    goal_r = gr + 1
+    goal_c = gc + 1
+
+    g = np.full(n, int32_max, dtype=np.int32)
+    parent_action = np.full(n, -1, dtype=np.int32) # Row of action_deltas that reached each cell
+    flat_deltas = np.empty(action_deltas.shape[0], dtype=np.int64)
+    for k in range(action_deltas.shape[0]):
+        flat_deltas[k] = action_deltas[k, 1] * W + action_deltas[k, 2]
+
+    # Heap items pack (f << 32) | pos into one int64; each cell is expanded at most once, so at most
+    # 4 pushes per cell plus the start can ever be live.
+    heap = np.empty(4 * n + 1, dtype=np.int64)
+    g[start] = 0
+    heap[0] = (np.int64(abs(sr - gr) + abs(sc - gc)) << 32) | start
+    size = 1
+
+    while size > 0:
+        item, size = _heap_pop(heap, size)
+        pos = item & 0xFFFFFFFF
+        f = item >> 32
+        r = pos // W
+        c = pos - r * W
+        cur_g = g[pos]
+        if f > cur_g + abs(r - goal_r) + abs(c - goal_c): # Stale entry, a cheaper path was pushed later
+            continue
+        if pos == goal:
+            break
+        for k in range(flat_deltas.shape[0]):
+            nb = pos + flat_deltas[k]
+            if flat_mask[nb]: # Wall or sentinel border
+                continue
+            ng = cur_g + 1
+            if ng >= g[nb]:
+                continue
+            g[nb] = ng
+            parent_action[nb] = k
+            nr = nb // W
+            nc = nb - nr * W
+            nf = ng + abs(nr - goal_r) + abs(nc - goal_c)
+            size = _heap_push(heap, size, (np.int64(nf) << 32) | nb)
+
+    if g[goal] == int32_max:
+        return -1
+
+    # Walk parents back from the goal until the cell whose parent is the start
+    pos = goal
+    while True:
+        k = parent_action[pos]
+        prev = pos - flat_deltas[k]
+        if prev == start:
+            return action_deltas[k, 0]
+        pos = prev
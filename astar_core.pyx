@@ -0,0 +1,140 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+#
+# Cython A* core used by a_star_agents.a_star_search when compiled. Build in place with:
+#     cythonize -i astar_core.pyx
+# Positions are flat indices into the environment's sentinel-bordered wall mask
+# (cell (r, c) lives at (r+1) * W + (c+1) with W = H + 2), so neighbor probes need no bounds checks.
+
+from libc.limits cimport INT_MAX
+from libc.stdlib cimport malloc, free
+
+# Moving actions in CooperativeChickenEnv._NEIGHBOR_DELTAS order; the ids must match the environment.
+cdef int N_MOVES = 4
+cdef int MOVE_ACTION[4]
+cdef int MOVE_DR[4]
+cdef int MOVE_DC[4]
+MOVE_ACTION[:] = [1, 2, 3, 4] # North, South, West, East
+MOVE_DR[:] = [-1, 1, 0, 0]
+MOVE_DC[:] = [0, 0, -1, 1]
+
+cdef inline void _heap_push(long long *heap, int *size, long long item) noexcept nogil:
+    cdef int i = size[0]
+    cdef int parent
+    cdef long long tmp
+    heap[i] = item
+    size[0] += 1
+    while i > 0:
+        parent = (i - 1) >> 1
+        if heap[parent] <= heap[i]:
+            break
+        tmp = heap[parent]; heap[parent] = heap[i]; heap[i] = tmp
+        i = parent
+
+cdef inline long long _heap_pop(long long *heap, int *size) noexcept nogil:
+    cdef long long top = heap[0]
+    cdef long long tmp
+    cdef int i = 0
+    cdef int left, child
+    size[0] -= 1
+    heap[0] = heap[size[0]]
+    while True:
+        left = 2 * i + 1
+        if left >= size[0]:
+            break
+        child = left
+        if left + 1 < size[0] and heap[left + 1] < heap[left]:
+            child = left + 1
+        if heap[i] <= heap[child]:
+            break
+        tmp = heap[i]; heap[i] = heap[child]; heap[child] = tmp
+        i = child
+    return top
+
+cpdef int astar_first_action(unsigned char[:, ::1] mask, int sr, int sc, int gr, int gc, int L, int H):
+    """
+    A* search on the wall mask, returning the first action of an optimal path.
+    Args:
+        mask: uint8 wall mask of shape (L+2, H+2) with a wall sentinel border (env._wall_mask).
+        sr, sc: Start position (r, c) in grid coordinates.
+        gr, gc: Goal position (r, c) in grid coordinates.
+        L, H: Grid dimensions.
+    Returns:
+        int: The first action id on the optimal path, or -1 if already at goal or no path exists.
+    """
+    cdef int W = H + 2
+    cdef int n = (L + 2) * W
+    cdef const unsigned char *flat_mask = &mask[0, 0]
+    cdef int start = (sr + 1) * W + (sc + 1)
+    cdef int goal = (gr + 1) * W + (gc + 1)
+    cdef int goal_r = gr + 1
+    cdef int goal_c = gc + 1
+    cdef int flat_delta[4]
+    cdef int *g_score
+    cdef signed char *parent_move
+    cdef long long *heap
+    cdef int size = 0
+    cdef int i, k, pos, nb, r, c, cur_g, ng, prev
+    cdef long long item, f
+    cdef int result = -1
+
+    if start == goal:
+        return -1
+
+    for k in range(N_MOVES):
+        flat_delta[k] = MOVE_DR[k] * W + MOVE_DC[k]
+
+    g_score = <int *> malloc(n * sizeof(int))
+    parent_move = <signed char *> malloc(n * sizeof(signed char))
+    # Each cell is expanded at most once, so at most 4 pushes per cell plus the start are ever live
+    heap = <long long *> malloc((4 * n + 1) * sizeof(long long))
+    if g_score == NULL or parent_move == NULL or heap == NULL:
+        free(g_score); free(parent_move); free(heap)
+        raise MemoryError()
+
+    try:
+        for i in range(n):
+            g_score[i] = INT_MAX
+        g_score[start] = 0
+        # Heap items pack (f << 32) | pos into one 64-bit key
+        _heap_push(heap, &size, ((<long long> (abs(sr - gr) + abs(sc - gc))) << 32) | start)
+
+        while size > 0:
+            item = _heap_pop(heap, &size)
+            pos = <int> (item & 0xFFFFFFFF)
+            f = item >> 32
+            r = pos // W
+            c = pos - r * W
+            cur_g = g_score[pos]
+            if f > cur_g + abs(r - goal_r) + abs(c - goal_c): # Stale entry, a cheaper path was pushed later
+                continue
+            if pos == goal:
+                break
+            ng = cur_g + 1
+            for k in range(N_MOVES):
+                nb = pos + flat_delta[k]
+                if flat_mask[nb]: # Wall or sentinel border
+                    continue
+                if ng >= g_score[nb]:
+                    continue
+                g_score[nb] = ng
+                parent_move[nb] = k
+                r = nb // W
+                c = nb - r * W
+                _heap_push(heap, &size, ((<long long> (ng + abs(r - goal_r) + abs(c - goal_c))) << 32) | nb)
+
+        if g_score[goal] != INT_MAX:
+            # Walk parents back from the goal until the cell whose parent is the start
+            pos = goal
+            while True:
+                k = parent_move[pos]
+                prev = pos - flat_delta[k]
+                if prev == start:
+                    result = MOVE_ACTION[k]
+                    break
+                pos = prev
+    finally:
+        free(g_score)
+        free(parent_move)
+        free(heap)
+
+    return result
@@ -0,0 +1,34 @@
+from collections import deque
+
+class BucketPQ:
+    """
+    Dial's bucket priority queue for small non-negative integer priorities.
+    Push and pop are O(1) amortized with no comparisons between payloads; entries with
+    equal priority come out in FIFO order. Suited to A* on unit-cost grids, where f-scores
+    are small integers and (with a consistent heuristic) never decrease between pops.
+    """
+    def __init__(self, max_f):
+        self.buckets = [deque() for _ in range(max_f + 1)]
+        self.min_idx = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, f, payload):
+        if f >= len(self.buckets): # Priority beyond the initial estimate, grow instead of failing
+            self.buckets.extend(deque() for _ in range(f + 1 - len(self.buckets)))
+        if f < self.min_idx:
+            self.min_idx = f
+        self.buckets[f].append(payload)
+        self.size += 1
+
+    def pop(self):
+        """Removes and returns (f, payload) for the lowest priority. Raises IndexError if empty."""
+        if not self.size:
+            raise IndexError("pop from an empty BucketPQ")
+        buckets = self.buckets
+        while not buckets[self.min_idx]:
+            self.min_idx += 1
+        self.size -= 1
+        return self.min_idx, buckets[self.min_idx].popleft()
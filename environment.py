@@ -20,6 +20,9 @@ class CooperativeChickenEnv(gym.Env):
         ACTION_EAST: (0, 1),   # Col increases
     }
 
+    # (action, dr, dc) for every action that actually moves, used for neighbor expansion in search
+    _NEIGHBOR_DELTAS = tuple((a, dr, dc) for a, (dr, dc) in ACTION_DELTAS.items() if (dr, dc) != (0, 0))
+
     def __init__(self, L=10, H=10, internal_wall_coords=None, max_episode_steps=100):
         super().__init__()
 
@@ -37,12 +40,52 @@ class CooperativeChickenEnv(gym.Env):
                 else:
                     raise ValueError(f"Internal wall coordinate ({r},{c}) is out of bounds for grid {L}x{H}.")
 
+        # Wall mask with a 1-cell sentinel border marked as wall: cell (r, c) lives at [r+1, c+1],
+        # so a single load answers "in bounds and not a wall" for any position one step off the grid.
+        self._wall_mask = np.ones((self.L + 2, self.H + 2), dtype=np.uint8)
+        self._wall_mask[1:self.L + 1, 1:self.H + 1] = 0
+        for r, c in self.walls:
+            self._wall_mask[r + 1, c + 1] = 1
+        # Same mask flattened to bytes for scalar lookups from Python, where indexing bytes is much
+        # cheaper than indexing a NumPy array: cell (r, c) lives at (r+1) * _mask_width + (c+1)
+        self._mask_width = self.H + 2
+        self._wall_bytes = self._wall_mask.tobytes()
+
+        # Static neighbor table, one entry per flat position r*H + c: the (action, neighbor_flat) pairs
+        # for every move that stays in bounds and off walls (empty for wall cells)
+        self._neighbors = [()] * (self.L * self.H)
+        for r in range(self.L):
+            for c in range(self.H):
+                if (r, c) not in self.walls:
+                    self._neighbors[r * self.H + c] = tuple(
+                        (a, (r + dr) * self.H + (c + dc)) for a, dr, dc in self._NEIGHBOR_DELTAS
+                        if self._wall_mask[r + dr + 1, c + dc + 1] == 0)
+
+        # Static part of the ansi render: one space-separated string per row with walls drawn in
+        self._base_rows = [" ".join("#" if (r, c) in self.walls else "." for c in range(self.H))
+                           for r in range(self.L)]
+
+        # Walls never change after construction; identifies this grid layout for cross-episode caches
+        self._grid_key = (self.L, self.H, frozenset(self.walls))
+
+        # Free cells never change, so entity placement samples from this instead of rescanning the grid
+        self._available_cells = tuple((r, c) for r in range(self.L) for c in range(self.H)
+                                      if (r, c) not in self.walls)
+
         # Check if enough space for entities
-        num_available_cells = self.L * self.H - len(self.walls)
+        num_available_cells = len(self._available_cells)
         if num_available_cells < 3:
             raise ValueError("Not enough available cells to place 2 agents and 1 chicken. "
                              "Grid size is too small or too many walls.")
 
+        # Reusable A* scratch arrays indexed by flat position r*H + c. A cell's entries are only
+        # meaningful when its _astar_gen matches the current _astar_epoch, so searches never clear them.
+        num_cells = self.L * self.H
+        self._astar_g = np.empty(num_cells, dtype=np.int32)
+        self._astar_gen = np.zeros(num_cells, dtype=np.int32)
+        self._astar_first_act = np.empty(num_cells, dtype=np.int32) # First action of the best path from start
+        self._astar_epoch = 0
+
         self.agent1_pos = None
         self.agent2_pos = None
         self.chicken_pos = None
@@ -66,29 +109,23 @@ class CooperativeChickenEnv(gym.Env):
 
         self.capture_reward = 100
         self.step_penalty = -1
+        self.collision_penalty = 100 # Charged to Agent 1 for moving onto Agent 2
 
         self.render_mode = 'ansi' # Default, can be changed by user
 
+        self._rng = None # random.Random for placement and chicken tie-breaks, (re)seeded in reset()
+
     def _manhattan_distance(self, pos1, pos2):
         return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
 
     def _is_valid_pos(self, r, c):
-        return 0 <= r < self.L and 0 <= c < self.H and (r, c) not in self.walls
+        return self._wall_bytes[(r + 1) * self._mask_width + c + 1] == 0
 
     def _place_entities(self):
-        available_cells = []
-        for r_idx in range(self.L):
-            for c_idx in range(self.H):
-                if (r_idx, c_idx) not in self.walls:
-                    available_cells.append((r_idx, c_idx))
-
-        if len(available_cells) < 3: # Should have been caught in __init__
-             raise Exception("Cannot place entities, not enough valid cells.")
-
-        pos_a1, pos_a2, pos_c = random.sample(available_cells, 3)
-        self.agent1_pos = tuple(pos_a1)
-        self.agent2_pos = tuple(pos_a2)
-        self.chicken_pos = tuple(pos_c)
+        pos_a1, pos_a2, pos_c = self._rng.sample(self._available_cells, 3)
+        self.agent1_pos = pos_a1
+        self.agent2_pos = pos_a2
+        self.chicken_pos = pos_c
 
     def _get_observation(self):
         return np.array([self.agent1_pos[0], self.agent1_pos[1],
@@ -97,6 +134,22 @@ class CooperativeChickenEnv(gym.Env):
 
     def reset(self, seed=None, options=None):
         super().reset(seed=seed) # Important for reproducibility via seeding
+        return self.soft_reset(seed)
+
+    def soft_reset(self, seed=None):
+        """
+        Starts a new episode on this env without rebuilding anything from __init__: the wall masks,
+        neighbor tables and A* scratch arrays are reused, only the entities and the
+        turn/round counters are set again. One env can therefore drive any number of episodes.
+        reset() is this plus gymnasium's seeding of np_random.
+        Args:
+            seed (int, optional): Reseeds entity placement and chicken tie-breaks.
+        Returns:
+            tuple: (observation, info), as returned by reset().
+        """
+        if seed is not None or self._rng is None:
+            # Like np_random, only reseed on an explicit seed so unseeded resets keep advancing one stream
+            self._rng = random.Random(seed)
         self._place_entities()
         self.current_player_idx = 0  # Agent 1 starts
         self.current_step_in_episode = 0
@@ -109,49 +162,37 @@ class CooperativeChickenEnv(gym.Env):
         a1_pos = self.agent1_pos
         a2_pos = self.agent2_pos
 
-        valid_next_positions_deltas = []
-        for action_val, (dr, dc) in self.ACTION_DELTAS.items():
-            next_r, next_c = c_pos[0] + dr, c_pos[1] + dc
-            if self._is_valid_pos(next_r, next_c):
-                valid_next_positions_deltas.append(((next_r, next_c), (dr,dc)))
-
-        if not valid_next_positions_deltas: # Should not happen if Stay is always possible
-            return # Chicken stays if no valid moves (e.g. completely boxed in)
+        a1r, a1c = a1_pos
+        a2r, a2c = a2_pos
+        d_c_a1_curr = abs(c_pos[0] - a1r) + abs(c_pos[1] - a1c)
+        d_c_a2_curr = abs(c_pos[0] - a2r) + abs(c_pos[1] - a2c)
 
-        d_c_a1_curr = self._manhattan_distance(c_pos, a1_pos)
-        d_c_a2_curr = self._manhattan_distance(c_pos, a2_pos)
-
-        scored_moves = [] # Stores ( (primary_dist_metric, secondary_dist_metric), next_pos_tuple )
-        for next_pos, _ in valid_next_positions_deltas:
-            nd1 = self._manhattan_distance(next_pos, a1_pos)
-            nd2 = self._manhattan_distance(next_pos, a2_pos)
-            scored_moves.append(((nd1, nd2), next_pos))
-
-        # Determine sorting key based on which agent is closer or if tied
+        # Determine the score to maximize based on which agent is closer or if tied, as weights on (nd1, nd2)
         if d_c_a1_curr < d_c_a2_curr: # A1 is closer, move away from A1
-            # Maximize distance to A1. Tie-break randomly later.
-            scored_moves.sort(key=lambda x: x[0][0], reverse=True)
-            best_primary_score = scored_moves[0][0][0]
-            candidate_moves = [m for m in scored_moves if m[0][0] == best_primary_score]
-
+            w1, w2 = 1, 0
         elif d_c_a2_curr < d_c_a1_curr: # A2 is closer, move away from A2
-            # Maximize distance to A2. Tie-break randomly later.
-            scored_moves.sort(key=lambda x: x[0][1], reverse=True)
-            best_primary_score = scored_moves[0][0][1]
-            candidate_moves = [m for m in scored_moves if m[0][1] == best_primary_score]
-
+            w1, w2 = 0, 1
         else: # Equidistant: move away from A1 (primary), then A2 (secondary)
-            # Maximize distance to A1, then use distance to A2 as tie-breaker
-            scored_moves.sort(key=lambda x: (x[0][0], x[0][1]), reverse=True)
-            best_score_tuple = scored_moves[0][0]
-            candidate_moves = [m for m in scored_moves if m[0] == best_score_tuple]
-
-        if candidate_moves:
-            # "Break these ties randomly if they are insufficient"
-            chosen_move_score, chosen_next_pos = random.choice(candidate_moves)
-            self.chicken_pos = chosen_next_pos
-        else: # Should not be reached if Stay is a valid move
-            pass # Chicken stays if logic somehow fails to find a move
+            # nd2 < L + H, so this orders lexicographically by (nd1, nd2)
+            w1, w2 = self.L + self.H, 1
+
+        # Candidates in action order: Stay, then the precomputed in-bounds, wall-free moves. A scalar
+        # loop over at most five cells is cheaper than building NumPy arrays for them.
+        H = self.H
+        c_flat = c_pos[0] * H + c_pos[1]
+        best_score = -1
+        candidate_moves = []
+        for nxt in (c_flat, *[n for _, n in self._neighbors[c_flat]]):
+            nr, nc = divmod(nxt, H)
+            score = w1 * (abs(nr - a1r) + abs(nc - a1c)) + w2 * (abs(nr - a2r) + abs(nc - a2c))
+            if score > best_score:
+                best_score = score
+                candidate_moves = [(nr, nc)]
+            elif score == best_score:
+                candidate_moves.append((nr, nc))
+
+        # "Break these ties randomly if they are insufficient"
+        self.chicken_pos = self._rng.choice(candidate_moves)
 
 
     def step(self, action):
@@ -184,7 +225,7 @@ class CooperativeChickenEnv(gym.Env):
         if self.agent1_pos == self.agent2_pos:
             # Terminate if agents collide, applying a penalty
             if self.current_player_idx == 0:
-                reward -= 100
+                reward -= self.collision_penalty
 
         if terminated:
             observation = self._get_observation()
@@ -219,19 +260,22 @@ class CooperativeChickenEnv(gym.Env):
 
     def render(self):
         if self.render_mode == 'ansi':
-            grid_repr = [["." for _ in range(self.H)] for _ in range(self.L)]
-            for r_wall, c_wall in self.walls:
-                grid_repr[r_wall][c_wall] = "#"
-
-            if self.chicken_pos: grid_repr[self.chicken_pos[0]][self.chicken_pos[1]] = "C"
+            # Entities in drawing order; later entries overwrite earlier ones on the same cell
+            overlay = {}
+            if self.chicken_pos: overlay[self.chicken_pos] = "C"
             # Agents overwrite chicken if on same spot for rendering order
-            if self.agent1_pos: grid_repr[self.agent1_pos[0]][self.agent1_pos[1]] = "1"
-            if self.agent2_pos: grid_repr[self.agent2_pos[0]][self.agent2_pos[1]] = "2"
+            if self.agent1_pos: overlay[self.agent1_pos] = "1"
+            if self.agent2_pos: overlay[self.agent2_pos] = "2"
             # If A1 and A2 on same spot (unlikely if they don't move simultaneously to same empty cell)
             if self.agent1_pos and self.agent2_pos and self.agent1_pos == self.agent2_pos:
-                grid_repr[self.agent1_pos[0]][self.agent1_pos[1]] = "X" # Both agents
+                overlay[self.agent1_pos] = "X" # Both agents
+
+            # Start from the pre-joined static rows and only patch the cells holding entities
+            rows = list(self._base_rows)
+            for (r, c), symbol in overlay.items():
+                rows[r] = rows[r][:2 * c] + symbol + rows[r][2 * c + 1:]
 
-            output = "\n".join([" ".join(row) for row in grid_repr])
+            output = "\n".join(rows)
             output += f"\nTurn: Agent {self.current_player_idx + 1 if self.current_player_idx in [0,1] else 'Chicken/End'}"
             output += f" | Round Step: {self.current_step_in_episode}/{self.max_episode_steps}"
             output += f"\nA1: {self.agent1_pos}, A2: {self.agent2_pos}, C: {self.chicken_pos}"
@@ -0,0 +1,94 @@
+import numpy as np
+
+# Bits of EpisodeHistory.flags
+FLAG_TERMINATED = 1
+FLAG_TRUNCATED = 2
+
+class EpisodeHistory:
+    """
+    Struct-of-arrays log of one episode, one row per recorded step (the initial state is row 0).
+    Grid parameters are stored once instead of per step.
+
+    Indexing still yields the per-step dictionary the episode runners used to build
+    (history[i]['agent1_pos'], history[-1]['terminated'], ...), so replay and inspection
+    code can keep treating a history as a list of dicts.
+    """
+    def __init__(self, capacity, L, H, walls):
+        self.positions = np.empty((capacity, 6), dtype=np.int16) # a1_r, a1_c, a2_r, a2_c, c_r, c_c
+        self.acting_agent = np.full(capacity, -1, dtype=np.int8)
+        self.actions = np.full(capacity, -1, dtype=np.int8) # -1 where no action was taken (initial state)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.round_step = np.zeros(capacity, dtype=np.int32)
+        self.flags = np.zeros(capacity, dtype=np.uint8)
+        self.grid_render_strs = {} # Row index -> ansi render, only for steps recorded while rendering
+        self.L = L
+        self.H = H
+        self.walls = walls
+        self.length = 0
+        self._cumulative_rewards = None # Cached result of cumulative_rewards()
+
+    def record(self, env, acting_agent, action, reward, terminated, truncated, grid_render_str=None):
+        """Appends the environment's current state and the step that led to it."""
+        i = self.length
+        a1, a2, c = env.agent1_pos, env.agent2_pos, env.chicken_pos
+        self.positions[i] = (a1[0], a1[1], a2[0], a2[1], c[0], c[1])
+        self.acting_agent[i] = acting_agent
+        self.actions[i] = -1 if action is None else action
+        self.rewards[i] = reward
+        self.round_step[i] = env.current_step_in_episode
+        self.flags[i] = (FLAG_TERMINATED if terminated else 0) | (FLAG_TRUNCATED if truncated else 0)
+        if grid_render_str is not None:
+            self.grid_render_strs[i] = grid_render_str
+        self.length = i + 1
+
+    def cumulative_rewards(self):
+        """
+        Running reward totals of A1 and A2 after each recorded step, as a (length, 2) array.
+        Derived from rewards and acting_agent with one prefix sum per agent instead of being tracked
+        per step; cached until more rows are recorded.
+        """
+        totals = self._cumulative_rewards
+        if totals is None or len(totals) != self.length:
+            acting_agent = self.acting_agent[:self.length]
+            rewards = self.rewards[:self.length]
+            totals = np.empty((self.length, 2), dtype=np.float32)
+            for agent in (0, 1):
+                np.cumsum(np.where(acting_agent == agent, rewards, 0), out=totals[:, agent])
+            self._cumulative_rewards = totals
+        return totals
+
+    def mark_truncated(self):
+        """Flags the last recorded step as truncated (e.g. when a runner hits its loop limit)."""
+        self.flags[self.length - 1] |= FLAG_TRUNCATED
+
+    def __getstate__(self):
+        """Pickles only the recorded rows, not the preallocated capacity (histories come back from worker processes)."""
+        state = self.__dict__.copy()
+        for name in ('positions', 'acting_agent', 'actions', 'rewards', 'round_step', 'flags'):
+            state[name] = state[name][:self.length]
+        state['_cumulative_rewards'] = None # Cheap to rebuild on the receiving side
+        return state
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, i):
+        i = range(self.length)[i] # Normalizes negative indices, raises IndexError when out of range
+        p = self.positions[i]
+        action = int(self.actions[i])
+        totals = self.cumulative_rewards()[i]
+        return {
+            'grid_render_str': self.grid_render_strs.get(i),
+            'agent1_pos': (int(p[0]), int(p[1])),
+            'agent2_pos': (int(p[2]), int(p[3])),
+            'chicken_pos': (int(p[4]), int(p[5])),
+            'acting_agent': int(self.acting_agent[i]),
+            'action_taken': None if action < 0 else action,
+            'reward_received': float(self.rewards[i]),
+            'total_reward_agent1_so_far': float(totals[0]),
+            'total_reward_agent2_so_far': float(totals[1]),
+            'terminated': bool(self.flags[i] & FLAG_TERMINATED),
+            'truncated': bool(self.flags[i] & FLAG_TRUNCATED),
+            'round_step': int(self.round_step[i]),
+            'L': self.L, 'H': self.H, 'walls': self.walls
+        }
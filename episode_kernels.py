@@ -0,0 +1,299 @@
+import numpy as np
+from numba import njit, prange
+
+from environment import CooperativeChickenEnv
+from episode_history import FLAG_TERMINATED, FLAG_TRUNCATED
+from heuristic_agents import _ACTION_VALS, _ACTION_DELTAS
+
+# Compiled batch driver for evaluation runs: whole episodes are played inside numba, without the
+# gymnasium API, histories or rendering. The run_*_agents_episode runners stay the reference
+# implementation for rendering and debugging; the rules here mirror CooperativeChickenEnv.step
+# (test_episode_kernels compares the two) and every reward comes in from the env's attributes.
+#
+# An episode's state is an int64 array of STATE_SIZE entries:
+#   [a1_r, a1_c, a2_r, a2_c, c_r, c_c, current_player_idx, current_step_in_episode]
+# Walls come in as the environment's sentinel-bordered uint8 mask (env._wall_mask), where cell (r, c)
+# lives at [r+1, c+1], so every move probe is a single load with no bounds checks.
+
+STATE_SIZE = 8
+
+AGENT_RANDOM = 0
+AGENT_HEURISTIC = 1
+_AGENT_KINDS = {"Random": AGENT_RANDOM, "Heuristic": AGENT_HEURISTIC} # Keyed like visualizer.AGENT_TYPES
+
+# heuristic_agents' action deltas as dr0, dc0, dr1, dc1, ... in ascending action order
+_DELTAS_FLAT = _ACTION_DELTAS.ravel().copy()
+_NUM_ACTIONS = len(_ACTION_VALS)
+
+@njit(cache=True, fastmath=True)
+def _argmin_manhattan(ar, ac, cr, cc, deltas_flat, n):
+    """
+    Index of the delta whose intended position is closest to (cr, cc); the first index wins ties.
+    Compiled counterpart of heuristic_agents' action table, used by the heuristic agents in run_many.
+    """
+    best = 1 << 30
+    bi = 0
+    for i in range(n):
+        d = abs(ar + deltas_flat[2 * i] - cr) + abs(ac + deltas_flat[2 * i + 1] - cc)
+        bi = i if d < best else bi
+        best = d if d < best else best
+    return bi
+
+@njit(cache=True)
+def _place_entities_nb(free_cells, state):
+    """Places both agents and the chicken on three distinct free cells (partial Fisher-Yates)."""
+    n = free_cells.shape[0]
+    idx = np.arange(n)
+    for k in range(3):
+        j = k + np.random.randint(n - k)
+        idx[k], idx[j] = idx[j], idx[k]
+        state[2 * k] = free_cells[idx[k], 0]
+        state[2 * k + 1] = free_cells[idx[k], 1]
+    state[6] = 0
+    state[7] = 0
+
+@njit(cache=True)
+def _chicken_move_nb(mask, state, deltas):
+    """Moves the chicken away from the closer agent, like CooperativeChickenEnv._chicken_move."""
+    cr, cc = state[4], state[5]
+    a1r, a1c, a2r, a2c = state[0], state[1], state[2], state[3]
+    d1 = abs(cr - a1r) + abs(cc - a1c)
+    d2 = abs(cr - a2r) + abs(cc - a2c)
+    span = (mask.shape[0] - 2) + (mask.shape[1] - 2) # L + H, exceeds any distance on the grid
+
+    cand_r = np.empty(deltas.shape[0], dtype=np.int64)
+    cand_c = np.empty(deltas.shape[0], dtype=np.int64)
+    best = -1
+    n_best = 0
+    for k in range(deltas.shape[0]):
+        nr = cr + deltas[k, 0]
+        nc = cc + deltas[k, 1]
+        if mask[nr + 1, nc + 1]:
+            continue
+        nd1 = abs(nr - a1r) + abs(nc - a1c)
+        nd2 = abs(nr - a2r) + abs(nc - a2c)
+        if d1 < d2:
+            score = nd1
+        elif d2 < d1:
+            score = nd2
+        else: # Equidistant: lexicographic (nd1, nd2)
+            score = nd1 * span + nd2
+        if score > best:
+            best = score
+            n_best = 0
+        if score == best:
+            cand_r[n_best] = nr
+            cand_c[n_best] = nc
+            n_best += 1
+
+    if n_best == 0: # Boxed in, chicken stays
+        return
+    pick = np.random.randint(n_best)
+    state[4] = cand_r[pick]
+    state[5] = cand_c[pick]
+
+@njit(cache=True)
+def step_nb(mask, state, action, deltas, max_episode_steps, capture_reward, step_penalty, collision_penalty):
+    """
+    Applies one agent action to state in place, following CooperativeChickenEnv.step.
+    Args:
+        mask (np.ndarray): uint8 wall mask of shape (L+2, H+2) with a wall sentinel border.
+        state (np.ndarray): int64 episode state of STATE_SIZE entries, updated in place.
+        action (int): Action id of the agent whose turn it is (state[6]).
+        deltas (np.ndarray): (dr, dc) rows indexed by action id.
+        max_episode_steps, capture_reward, step_penalty, collision_penalty: The environment's parameters.
+    Returns:
+        tuple: (reward, terminated, truncated) for the acting agent.
+    """
+    player = state[6]
+    base = 2 * player
+    nr = state[base] + deltas[action, 0]
+    nc = state[base + 1] + deltas[action, 1]
+    if mask[nr + 1, nc + 1] == 0:
+        state[base] = nr
+        state[base + 1] = nc
+
+    reward = step_penalty
+    terminated = state[base] == state[4] and state[base + 1] == state[5]
+    if terminated:
+        reward += capture_reward
+    if player == 0 and state[0] == state[2] and state[1] == state[3]:
+        reward -= collision_penalty
+
+    if terminated: # Like the env, the turn stays with the capturing agent
+        return reward, True, False
+    if player == 0:
+        state[6] = 1
+        return reward, False, False
+
+    _chicken_move_nb(mask, state, deltas)
+    state[6] = 0
+    state[7] += 1
+    return reward, False, state[7] >= max_episode_steps
+
+@njit(cache=True, parallel=True)
+def run_many(mask, free_cells, deltas, seeds, agent_kind, max_episode_steps, capture_reward, step_penalty,
+             collision_penalty):
+    """
+    Plays one episode per seed in parallel.
+    Args:
+        mask (np.ndarray): uint8 wall mask of shape (L+2, H+2) with a wall sentinel border.
+        free_cells (np.ndarray): int64 array of shape (n, 2) with the grid's non-wall cells.
+        deltas (np.ndarray): (dr, dc) rows indexed by action id.
+        seeds (np.ndarray): int64 seed per episode; an episode is reproducible from its seed alone.
+        agent_kind (int): AGENT_RANDOM or AGENT_HEURISTIC, used by both agents.
+        max_episode_steps, capture_reward, step_penalty, collision_penalty: The environment's parameters.
+    Returns:
+        tuple: (rewards_agent1, rewards_agent2, lengths, captured) arrays of one entry per episode,
+               lengths counting full A1-A2-Chicken rounds like env.current_step_in_episode.
+    """
+    n_episodes = seeds.shape[0]
+    n_actions = deltas.shape[0]
+    rewards1 = np.zeros(n_episodes, dtype=np.float64)
+    rewards2 = np.zeros(n_episodes, dtype=np.float64)
+    lengths = np.zeros(n_episodes, dtype=np.int64)
+    captured = np.zeros(n_episodes, dtype=np.bool_)
+    # Same panic exit as the Python runners, in case truncation never fires
+    max_agent_steps = 4 * max_episode_steps
+
+    for b in prange(n_episodes):
+        np.random.seed(seeds[b]) # numba keeps one generator per thread, seeded per episode
+        state = np.empty(STATE_SIZE, dtype=np.int64)
+        _place_entities_nb(free_cells, state)
+        total1 = 0.0
+        total2 = 0.0
+        for _ in range(max_agent_steps + 1):
+            player = state[6]
+            if agent_kind == AGENT_HEURISTIC:
+                action = _ACTION_VALS[_argmin_manhattan(state[2 * player], state[2 * player + 1],
+                                                        state[4], state[5], _DELTAS_FLAT, _NUM_ACTIONS)]
+            else:
+                action = np.random.randint(n_actions)
+            reward, terminated, truncated = step_nb(mask, state, action, deltas, max_episode_steps,
+                                                    capture_reward, step_penalty, collision_penalty)
+            if player == 0:
+                total1 += reward
+            else:
+                total2 += reward
+            if terminated or truncated:
+                captured[b] = terminated
+                break
+        rewards1[b] = total1
+        rewards2[b] = total2
+        lengths[b] = state[7]
+
+    return rewards1, rewards2, lengths, captured
+
+@njit(cache=True)
+def _play_episode_nb(mask, state, deltas, actions, max_episode_steps, capture_reward, step_penalty,
+                     collision_penalty, seed, log, row, positions, acting_agent, actions_out, rewards, round_step,
+                     flags):
+    """
+    Plays the pre-drawn actions from state until the episode ends, optionally writing one history row
+    per agent step into EpisodeHistory's arrays starting at row.
+    Returns:
+        tuple: (total_reward_agent1, total_reward_agent2, rows used, whether the episode ended).
+    """
+    np.random.seed(seed) # Chicken tie-breaks
+    total1 = 0
+    total2 = 0
+    for k in range(actions.shape[0]):
+        player = state[6]
+        action = actions[k]
+        reward, terminated, truncated = step_nb(mask, state, action, deltas, max_episode_steps,
+                                                capture_reward, step_penalty, collision_penalty)
+        if player == 0:
+            total1 += reward
+        else:
+            total2 += reward
+        if log:
+            for j in range(6):
+                positions[row, j] = state[j]
+            acting_agent[row] = player
+            actions_out[row] = action
+            rewards[row] = reward
+            round_step[row] = state[7]
+            flags[row] = (FLAG_TERMINATED if terminated else 0) | (FLAG_TRUNCATED if truncated else 0)
+            row += 1
+        if terminated or truncated:
+            return total1, total2, row, True
+    return total1, total2, row, False
+
+def play_random_episode(env, actions, history_log=None):
+    """
+    Compiled counterpart of the step loop in run_random_agents_episode: plays actions (one per agent
+    step) from env's current state until the episode ends, then writes the final state back to env.
+    If the actions run out first the episode counts as truncated, like the runner's panic exit.
+    Chicken tie-breaks draw from a generator seeded off env._rng, so seeded episodes stay reproducible
+    (but differ from the pure-Python loop's).
+    Args:
+        env (CooperativeChickenEnv): A reset environment.
+        actions (np.ndarray): Action ids to play in order.
+        history_log (EpisodeHistory, optional): History to append one row per agent step to.
+    Returns:
+        tuple: (total_reward_agent1, total_reward_agent2)
+    """
+    state = np.array([env.agent1_pos[0], env.agent1_pos[1], env.agent2_pos[0], env.agent2_pos[1],
+                      env.chicken_pos[0], env.chicken_pos[1], env.current_player_idx, env.current_step_in_episode],
+                     dtype=np.int64)
+    deltas = np.array([env.ACTION_DELTAS[a] for a in range(env.action_space.n)], dtype=np.int64)
+    log = history_log is not None
+    if log:
+        h = history_log
+        arrays = (h.positions, h.acting_agent, h.actions, h.rewards, h.round_step, h.flags)
+        row = h.length
+    else: # Typed placeholders, never written to
+        arrays = (np.empty((0, 6), dtype=np.int16), np.empty(0, dtype=np.int8), np.empty(0, dtype=np.int8),
+                  np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int32),
+                  np.empty(0, dtype=np.uint8))
+        row = 0
+
+    total1, total2, row, ended = _play_episode_nb(
+        env._wall_mask, state, deltas, np.asarray(actions, dtype=np.int64), env.max_episode_steps,
+        env.capture_reward, env.step_penalty, env.collision_penalty, env._rng.getrandbits(31), log, row, *arrays)
+
+    env.agent1_pos = (int(state[0]), int(state[1]))
+    env.agent2_pos = (int(state[2]), int(state[3]))
+    env.chicken_pos = (int(state[4]), int(state[5]))
+    env.current_player_idx = int(state[6])
+    env.current_step_in_episode = int(state[7])
+    if log:
+        history_log.length = row
+        if not ended:
+            history_log.mark_truncated()
+    return int(total1), int(total2)
+
+def run_episodes_batch(env, num_episodes, agent_type="Heuristic", seed=None):
+    """
+    Runs num_episodes evaluation episodes on env's grid in a single compiled call.
+    The env itself is only read (grid and parameters); its state is left untouched.
+    Args:
+        env (CooperativeChickenEnv): The environment describing grid, walls and rewards.
+        num_episodes (int): Number of episodes to play.
+        agent_type (str): "Random" or "Heuristic", the policy used by both agents.
+        seed (int, optional): Seed for the per-episode seeds, for reproducible batches.
+    Returns:
+        tuple: (rewards_agent1, rewards_agent2, lengths, captured) NumPy arrays, one entry per episode.
+    """
+    if agent_type not in _AGENT_KINDS:
+        raise ValueError(f"Unsupported agent type {agent_type!r} for batch runs, expected one of {list(_AGENT_KINDS)}.")
+    seeds = np.random.default_rng(seed).integers(0, 2**31 - 1, size=num_episodes, dtype=np.int64)
+    free_cells = np.array(env._available_cells, dtype=np.int64).reshape(-1, 2)
+    deltas = np.array([env.ACTION_DELTAS[a] for a in range(env.action_space.n)], dtype=np.int64)
+    return run_many(env._wall_mask, free_cells, deltas, seeds, _AGENT_KINDS[agent_type],
+                    env.max_episode_steps, env.capture_reward, env.step_penalty, env.collision_penalty)
+
+
+if __name__ == '__main__':
+    import time
+
+    custom_walls = set([(1,1), (1,2), (1,3), (3,3), (3,4), (4,4), (5,4)])
+    test_env = CooperativeChickenEnv(L=7, H=7, internal_wall_coords=custom_walls, max_episode_steps=50)
+    for agent_type in _AGENT_KINDS:
+        run_episodes_batch(test_env, 1, agent_type, seed=0) # Compile before timing
+        start = time.perf_counter()
+        r1, r2, lengths, captured = run_episodes_batch(test_env, 10000, agent_type, seed=42)
+        elapsed = time.perf_counter() - start
+        print(f"{agent_type}: {len(r1)} episodes in {elapsed:.3f}s | "
+              f"avg A1={r1.mean():.2f}, avg A2={r2.mean():.2f}, avg length={lengths.mean():.2f}, "
+              f"capture rate={captured.mean():.2%}")
@@ -0,0 +1,46 @@
+import numpy as np
+from environment import CooperativeChickenEnv
+from random_agents import run_random_agents_episode
+from heuristic_agents import run_heuristic_agents_episode
+from a_star_agents import run_a_star_agents_episode
+
+# Episode runners by agent type name (the names listed in visualizer.AGENT_TYPES)
+AGENT_RUNNERS = {
+    "Random": run_random_agents_episode,
+    "Heuristic": run_heuristic_agents_episode,
+    "A*": run_a_star_agents_episode,
+}
+
+# Environments by (wall mask bytes, shape, max_steps), one per grid layout per worker process.
+# Every runner resets the environment before its episode, so one instance serves every episode
+# on that grid and its construction (wall masks, neighbor tables, A* scratch arrays) is paid
+# once per process.
+_ENV_CACHE = {}
+
+def _cached_env(wall_mask, max_steps):
+    """Returns this process's environment for the grid described by wall_mask, building it on first use."""
+    key = (wall_mask.tobytes(), wall_mask.shape, max_steps)
+    env = _ENV_CACHE.get(key)
+    if env is None:
+        L, H = wall_mask.shape
+        walls = [tuple(rc) for rc in np.argwhere(wall_mask).tolist()]
+        env = _ENV_CACHE[key] = CooperativeChickenEnv(L=L, H=H, internal_wall_coords=walls,
+                                                      max_episode_steps=max_steps)
+    return env
+
+def run_experiment_episode(agent_type, wall_mask, max_steps):
+    """
+    Runs one episode and returns its result.
+    Lives in its own module, which does not use pygame, so the visualizer's spawned worker processes
+    can run it; they re-import visualizer.py as __mp_main__, which imports pygame but leaves it uninitialized.
+    Args:
+        agent_type (str): Key of AGENT_RUNNERS.
+        wall_mask (np.ndarray): L x H uint8 array, nonzero at internal walls. Pickles as one small
+                                buffer, so it is cheap to send to every worker.
+        max_steps (int): The environment's max_episode_steps.
+    Returns:
+        dict: {"r1", "r2", "length", "history"} for the episode.
+    """
+    env = _cached_env(wall_mask, max_steps)
+    r1, r2, length, history = AGENT_RUNNERS[agent_type](env, render_episode_to_console=False)
+    return {"r1": r1, "r2": r2, "length": length, "history": history}
@@ -1,10 +1,34 @@
-import gymnasium as gym
 import numpy as np
 from environment import CooperativeChickenEnv
-
-def _manhattan_distance(pos1, pos2):
-    """Helper function to calculate Manhattan distance."""
-    return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
+from episode_history import EpisodeHistory
+
+# Action ids in ascending order with their (dr, dc) deltas as rows, built once at import.
+# Ascending order makes argmin break distance ties towards the lowest action id.
+_ACTION_VALS = np.array(sorted(CooperativeChickenEnv.ACTION_DELTAS), dtype=np.int32)
+_ACTION_DELTAS = np.array([CooperativeChickenEnv.ACTION_DELTAS[a] for a in _ACTION_VALS], dtype=np.int32)
+
+# Heuristic actions per grid size. The heuristic ignores walls and depends only on the chicken's
+# offset from the agent, so each (L, H) gets one table indexed by [dr + L - 1, dc + H - 1] that
+# covers every offset on the grid and is shared by every position pair and every episode.
+_HEUR_CACHE = {}
+
+def _build_heuristic_table(L, H):
+    """Argmin action for every chicken offset on an L x H grid, computed in one vectorized pass."""
+    off_r, off_c = np.indices((2 * L - 1, 2 * H - 1), dtype=np.int32)
+    off_r -= L - 1
+    off_c -= H - 1
+    # Distance from each action's intended position to the chicken, shape (num_actions, 2L-1, 2H-1)
+    dists = (np.abs(_ACTION_DELTAS[:, 0, None, None] - off_r)
+             + np.abs(_ACTION_DELTAS[:, 1, None, None] - off_c))
+    return _ACTION_VALS[dists.argmin(axis=0)].astype(np.int8) # argmin keeps the first minimum on ties
+
+def _heuristic_cache(env):
+    """Returns the action table for env's grid size, building it on first use."""
+    key = (env.L, env.H)
+    cache = _HEUR_CACHE.get(key)
+    if cache is None:
+        cache = _HEUR_CACHE[key] = _build_heuristic_table(env.L, env.H)
+    return cache
 
 def choose_heuristic_action(agent_pos, chicken_pos, env):
     """
@@ -17,47 +41,27 @@ def choose_heuristic_action(agent_pos, chicken_pos, env):
     Returns:
         int: The chosen action.
     """
-    best_action = env.ACTION_STAY # Default to staying
-    min_dist = _manhattan_distance(agent_pos, chicken_pos)
-
-    candidate_actions = [] # To store (distance, action)
-
-    for action_val, (dr, dc) in env.ACTION_DELTAS.items():
-        next_r, next_c = agent_pos[0] + dr, agent_pos[1] + dc
-        
-        # Check if the *intended* next position is valid.
-        # The environment's step function will handle final validity (e.g. if agent hits wall, it stays).
-        # Here, we are interested in the heuristic value of the *intended* move.
-        # We don't need to check env._is_valid_pos explicitly for action choice,
-        # as the heuristic is based on intended position. The env handles consequences.
-        
-        potential_pos = (next_r, next_c)
-        dist = _manhattan_distance(potential_pos, chicken_pos)
-        candidate_actions.append((dist, action_val))
-
-    if not candidate_actions:
-        return env.ACTION_STAY # Should not happen if ACTION_STAY is always an option
-
-    # Sort by distance (ascending), then by action value (arbitrary tie-break)
-    candidate_actions.sort(key=lambda x: (x[0], x[1]))
-    
-    # Choose the action that leads to the minimum distance
-    best_action = candidate_actions[0][1]
-    
-    return best_action
+    # Walls are not checked here: the environment's step function handles the consequences
+    # (an agent hitting a wall stays in place), the heuristic only scores the intent.
+    ar, ac = agent_pos
+    cr, cc = chicken_pos
+    return int(_heuristic_cache(env)[cr - ar + env.L - 1, cc - ac + env.H - 1])
 
 
-def run_heuristic_agents_episode(env, render_episode_to_console=False):
+def run_heuristic_agents_episode(env, render_episode_to_console=False, log_history=True):
     """
     Runs a single episode with two heuristic agents.
 
     Args:
         env: An instance of the CooperativeChickenEnv.
         render_episode_to_console (bool): Whether to print the state of the environment to console.
+        log_history (bool): Whether to record the per-step history. Disable for evaluation runs that only
+                            need rewards and lengths.
 
     Returns:
         tuple: (total_reward_agent1, total_reward_agent2, episode_length, history_log)
-               history_log is a list of dictionaries, each detailing a step.
+               history_log is an EpisodeHistory (None if log_history is False);
+               history_log[i] is a dictionary detailing step i.
     """
     obs, info = env.reset()
     if render_episode_to_console:
@@ -66,33 +70,28 @@ def run_heuristic_agents_episode(env, render_episode_to_console=False):
         print(f"Observation: {obs}")
         print(f"Info: {info}")
 
-    history_log = []
-    history_log.append({
-        'grid_render_str': env.render(),
-        'agent1_pos': env.agent1_pos,
-        'agent2_pos': env.agent2_pos,
-        'chicken_pos': env.chicken_pos,
-        'acting_agent': info.get("current_player_to_act", -1),
-        'action_taken': None,
-        'reward_received': 0,
-        'total_reward_agent1_so_far': 0,
-        'total_reward_agent2_so_far': 0,
-        'terminated': False,
-        'truncated': False,
-        'info': info.copy(),
-        'round_step': env.current_step_in_episode,
-        'L': env.L, 'H': env.H, 'walls': list(env.walls)
-    })
+    # env.step truncates after max_episode_steps rounds of two agent steps each, so this is only a
+    # panic exit in case the episode never ends. It also bounds how many rows the history can hold
+    # (one per agent step plus the initial state).
+    max_agent_steps = 4 * env.max_episode_steps
+    history_log = EpisodeHistory(max_agent_steps + 2, env.L, env.H, tuple(env.walls)) if log_history else None
+    if log_history:
+        # Log initial state before any action
+        history_log.record(env, info.get("current_player_to_act", -1), None, 0, False, False,
+                           env.render() if render_episode_to_console else None)
 
     terminated = False
     truncated = False
     total_reward_agent1 = 0
     total_reward_agent2 = 0
-    
-    current_loop_iter = 0
-    max_loop_iters = env.max_episode_steps * 2 + 10
-
-    while not terminated and not truncated and current_loop_iter < max_loop_iters:
+    agent_steps = 0
+    # Bound once instead of being re-resolved on every step
+    env_step = env.step
+    env_render = env.render
+    record = history_log.record if log_history else None
+    choose_action = choose_heuristic_action
+
+    while not terminated and not truncated:
         current_player_idx_before_step = info.get("current_player_to_act", -1)
         action_taken_this_step = None
         reward_for_this_step = 0
@@ -101,12 +100,12 @@ def run_heuristic_agents_episode(env, render_episode_to_console=False):
             agent_pos = env.agent1_pos if current_player_idx_before_step == 0 else env.agent2_pos
             chicken_pos = env.chicken_pos
             
-            action_taken_this_step = choose_heuristic_action(agent_pos, chicken_pos, env)
+            action_taken_this_step = choose_action(agent_pos, chicken_pos, env)
 
             if render_episode_to_console:
                 print(f"\n--- Round {env.current_step_in_episode + 1}, Agent {current_player_idx_before_step + 1} (Heuristic) takes action: {action_taken_this_step} ---")
 
-            obs, reward_for_this_step, terminated, truncated, info = env.step(action_taken_this_step)
+            obs, reward_for_this_step, terminated, truncated, info = env_step(action_taken_this_step)
             
             if current_player_idx_before_step == 0:
                 total_reward_agent1 += reward_for_this_step
@@ -114,7 +113,7 @@ def run_heuristic_agents_episode(env, render_episode_to_console=False):
                 total_reward_agent2 += reward_for_this_step
 
             if render_episode_to_console:
-                print(env.render())
+                print(env_render())
                 print(f"Observation: {obs}")
                 print(f"Reward for Agent {current_player_idx_before_step + 1}: {reward_for_this_step}")
                 print(f"Terminated: {terminated}, Truncated: {truncated}")
@@ -126,31 +125,18 @@ def run_heuristic_agents_episode(env, render_episode_to_console=False):
                 print(f"\n--- Loop will exit. Current state: Terminated={terminated}, Truncated={truncated}, Info: {info} ---")
             break
 
-        history_log.append({
-            'grid_render_str': env.render(),
-            'agent1_pos': env.agent1_pos,
-            'agent2_pos': env.agent2_pos,
-            'chicken_pos': env.chicken_pos,
-            'acting_agent': current_player_idx_before_step,
-            'action_taken': action_taken_this_step,
-            'reward_received': reward_for_this_step,
-            'total_reward_agent1_so_far': total_reward_agent1,
-            'total_reward_agent2_so_far': total_reward_agent2,
-            'terminated': terminated,
-            'truncated': truncated,
-            'info': info.copy(),
-            'round_step': env.current_step_in_episode,
-            'L': env.L, 'H': env.H, 'walls': list(env.walls)
-        })
+        if log_history:
+            record(env, current_player_idx_before_step, action_taken_this_step, reward_for_this_step,
+                   terminated, truncated, env_render() if render_episode_to_console else None)
         
-        current_loop_iter += 1
-        if current_loop_iter >= max_loop_iters:
+        agent_steps += 1
+        if agent_steps > max_agent_steps:
             if render_episode_to_console:
                 print("Warning: Reached maximum loop iterations for the episode (Heuristic).")
-            if not terminated and not truncated:
-                truncated = True
-                history_log[-1]['truncated'] = True
-                if 'status' not in history_log[-1]['info']: history_log[-1]['info']['status'] = "max_loop_iters_reached"
+            truncated = True
+            if log_history:
+                history_log.mark_truncated()
+            break
 
     final_episode_length = env.current_step_in_episode
     if render_episode_to_console:
@@ -189,6 +175,6 @@ if __name__ == '__main__':
                  print(f"  {key}: {val}")
 
     print("\nRunning one test episode with Heuristic agents (console render ON)...")
-    test_env_render = CooperativeChickenEnv(**env_config) # Fresh env
-    r1_render, r2_render, length_render, history_render = run_heuristic_agents_episode(test_env_render, render_episode_to_console=True)
+    r1_render, r2_render, length_render, _ = run_heuristic_agents_episode(test_env, render_episode_to_console=True,
+                                                                          log_history=False) # Only the console output is used
     print(f"\nRendered episode finished. A1 Reward: {r1_render}, A2 Reward: {r2_render}, Length: {length_render} rounds.")
\ No newline at end of file
@@ -1,17 +1,26 @@
-import gymnasium as gym
-from environment import CooperativeChickenEnv 
+import numpy as np
+from environment import CooperativeChickenEnv
+from episode_history import EpisodeHistory
 
-def run_random_agents_episode(env, render_episode_to_console=False):
+try:
+    from episode_kernels import play_random_episode
+except ImportError: # numba not installed, episodes run through the Python step loop below
+    play_random_episode = None
+
+def run_random_agents_episode(env, render_episode_to_console=False, log_history=True):
     """
     Runs a single episode with two random agents.
 
     Args:
         env: An instance of the CooperativeChickenEnv.
         render_episode_to_console (bool): Whether to print the state of the environment to console.
+        log_history (bool): Whether to record the per-step history. Disable for evaluation runs that only
+                            need rewards and lengths.
 
     Returns:
         tuple: (total_reward_agent1, total_reward_agent2, episode_length, history_log)
-               history_log is a list of dictionaries, each detailing a step.
+               history_log is an EpisodeHistory (None if log_history is False);
+               history_log[i] is a dictionary detailing step i.
     """
     obs, info = env.reset()
     if render_episode_to_console:
@@ -20,47 +29,47 @@ def run_random_agents_episode(env, render_episode_to_console=False):
         print(f"Observation: {obs}")
         print(f"Info: {info}")
 
-    history_log = []
-    # Log initial state before any action
-    history_log.append({
-        'grid_render_str': env.render(), # For debug
-        'agent1_pos': env.agent1_pos,
-        'agent2_pos': env.agent2_pos,
-        'chicken_pos': env.chicken_pos,
-        'acting_agent': info.get("current_player_to_act", -1), 
-        'action_taken': None, 
-        'reward_received': 0, 
-        'total_reward_agent1_so_far': 0,
-        'total_reward_agent2_so_far': 0,
-        'terminated': False,
-        'truncated': False,
-        'info': info.copy(),
-        'round_step': env.current_step_in_episode, # Should be 0
-        'L': env.L, 'H': env.H, 'walls': list(env.walls) # Grid params for replay
-    })
-
+    # env.step truncates after max_episode_steps rounds of two agent steps each, so this is only a
+    # panic exit in case the episode never ends. It also bounds how many rows the history can hold
+    # (one per agent step plus the initial state).
+    max_agent_steps = 4 * env.max_episode_steps
+    # Draw every action the episode can need in one call instead of one action_space.sample() per step.
+    # env.np_random is seeded by env.reset, so a seeded episode stays reproducible.
+    random_actions = env.np_random.integers(0, env.action_space.n, size=max_agent_steps + 1, dtype=np.int8)
+    history_log = EpisodeHistory(max_agent_steps + 2, env.L, env.H, tuple(env.walls)) if log_history else None
+    if log_history:
+        # Log initial state before any action
+        history_log.record(env, info.get("current_player_to_act", -1), None, 0, False, False,
+                           env.render() if render_episode_to_console else None)
+
+    if play_random_episode is not None and not render_episode_to_console:
+        # Nothing to print per step, so the whole step loop runs compiled
+        total_reward_agent1, total_reward_agent2 = play_random_episode(env, random_actions, history_log)
+        return total_reward_agent1, total_reward_agent2, env.current_step_in_episode, history_log
+
+    random_actions = random_actions.tolist() # Plain ints index faster than NumPy scalars in the Python loop
     terminated = False
     truncated = False
     total_reward_agent1 = 0
     total_reward_agent2 = 0
-    
-    current_loop_iter = 0
-    # max_loop_iters: agent1, agent2, (chicken is part of agent2's step) for each step in episode
-    # plus a small buffer. Max steps is for full A1-A2-C rounds.
-    max_loop_iters = env.max_episode_steps * 2 + 10 
+    agent_steps = 0
+    # Bound once instead of being re-resolved on every step
+    env_step = env.step
+    env_render = env.render
+    record = history_log.record if log_history else None
 
-    while not terminated and not truncated and current_loop_iter < max_loop_iters:
+    while not terminated and not truncated:
         current_player_idx_before_step = info.get("current_player_to_act", -1)
         action_taken_this_step = None
         reward_for_this_step = 0
 
         if current_player_idx_before_step == 0 or current_player_idx_before_step == 1: # Agent's turn
-            action_taken_this_step = env.action_space.sample() 
+            action_taken_this_step = random_actions[agent_steps]
 
             if render_episode_to_console:
                 print(f"\n--- Round {env.current_step_in_episode + 1}, Agent {current_player_idx_before_step + 1} takes action: {action_taken_this_step} ---")
 
-            obs, reward_for_this_step, terminated, truncated, info = env.step(action_taken_this_step)
+            obs, reward_for_this_step, terminated, truncated, info = env_step(action_taken_this_step)
             
             if current_player_idx_before_step == 0:
                 total_reward_agent1 += reward_for_this_step
@@ -68,7 +77,7 @@ def run_random_agents_episode(env, render_episode_to_console=False):
                 total_reward_agent2 += reward_for_this_step
 
             if render_episode_to_console:
-                print(env.render())
+                print(env_render())
                 print(f"Observation: {obs}")
                 print(f"Reward for Agent {current_player_idx_before_step + 1}: {reward_for_this_step}")
                 print(f"Terminated: {terminated}, Truncated: {truncated}")
@@ -81,32 +90,18 @@ def run_random_agents_episode(env, render_episode_to_console=False):
             break 
 
         # Log state AFTER action (and potential chicken move if agent 2 acted)
-        history_log.append({
-            'grid_render_str': env.render(),
-            'agent1_pos': env.agent1_pos,
-            'agent2_pos': env.agent2_pos,
-            'chicken_pos': env.chicken_pos,
-            'acting_agent': current_player_idx_before_step, # Agent that JUST acted
-            'action_taken': action_taken_this_step,
-            'reward_received': reward_for_this_step,
-            'total_reward_agent1_so_far': total_reward_agent1,
-            'total_reward_agent2_so_far': total_reward_agent2,
-            'terminated': terminated,
-            'truncated': truncated,
-            'info': info.copy(), 
-            'round_step': env.current_step_in_episode, # Updated after A1, A2, C cycle
-            'L': env.L, 'H': env.H, 'walls': list(env.walls)
-        })
+        if log_history:
+            record(env, current_player_idx_before_step, action_taken_this_step, reward_for_this_step,
+                   terminated, truncated, env_render() if render_episode_to_console else None)
         
-        current_loop_iter += 1
-        if current_loop_iter >= max_loop_iters:
+        agent_steps += 1
+        if agent_steps > max_agent_steps:
             if render_episode_to_console:
                 print("Warning: Reached maximum loop iterations for the episode.")
-            if not terminated and not truncated: # Force truncation if loop limit hit
-                truncated = True
-                history_log[-1]['truncated'] = True # Update last history entry
-                if 'status' not in history_log[-1]['info']: history_log[-1]['info']['status'] = "max_loop_iters_reached"
-
+            truncated = True
+            if log_history:
+                history_log.mark_truncated()
+            break
 
     final_episode_length = env.current_step_in_episode # Number of full A1-A2-Chicken rounds completed
     if render_episode_to_console:
@@ -146,6 +141,5 @@ if __name__ == '__main__':
 
     # Example with console rendering enabled:
     # print("\nRunning one test episode with console rendering ON...")
-    # test_env_render = CooperativeChickenEnv(**env_config) # Fresh env
-    # r1_render, r2_render, length_render, history_render = run_random_agents_episode(test_env_render, render_episode_to_console=True)
+    # r1_render, r2_render, length_render, _ = run_random_agents_episode(test_env, render_episode_to_console=True, log_history=False)
     # print(f"\nRendered episode finished. A1 Reward: {r1_render}, A2 Reward: {r2_render}, Length: {length_render} rounds.")
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""
+A* backends against BFS-optimal first actions: the pure-Python search, the numba and Cython cores
+and the a_star_search dispatcher must all pick a first step on a shortest path.
+Run with `python -m unittest test_astar_backends` (or pytest) from the repository root.
+"""
+import random
+import unittest
+from collections import deque
+
+import a_star_agents
+from environment import CooperativeChickenEnv
+
+
+def _random_envs(seed, num_grids=300, max_size=15, max_wall_fraction=0.35):
+    """Random grids with random wall layouts, skipping layouts too crowded for the environment."""
+    rng = random.Random(seed)
+    for _ in range(num_grids):
+        L, H = rng.randint(3, max_size), rng.randint(3, max_size)
+        cells = [(r, c) for r in range(L) for c in range(H)]
+        walls = rng.sample(cells, rng.randint(0, int(max_wall_fraction * L * H)))
+        try:
+            yield rng, CooperativeChickenEnv(L=L, H=H, internal_wall_coords=walls, max_episode_steps=50)
+        except ValueError: # Fewer than 3 free cells
+            continue
+
+def _bfs_distances(env, goal):
+    """Shortest-path step counts to goal from every reachable flat position r * H + c."""
+    goal_flat = goal[0] * env.H + goal[1]
+    dist = {goal_flat: 0}
+    queue = deque([goal_flat])
+    while queue:
+        pos = queue.popleft()
+        for _, neighbor in env._neighbors[pos]:
+            if neighbor not in dist:
+                dist[neighbor] = dist[pos] + 1
+                queue.append(neighbor)
+    return dist
+
+def _python_backend(env, start, goal):
+    return a_star_agents._a_star_search_py(start, goal, env)
+
+def _numba_backend(env, start, goal):
+    action = a_star_agents._astar_numba(env._wall_mask, start[0], start[1], goal[0], goal[1],
+                                        a_star_agents._NEIGHBOR_DELTAS_ARR)
+    return env.ACTION_STAY if action < 0 else int(action)
+
+def _cython_backend(env, start, goal):
+    action = a_star_agents.astar_first_action(env._wall_mask, start[0], start[1], goal[0], goal[1], env.L, env.H)
+    return env.ACTION_STAY if action < 0 else action
+
+def _dispatch_backend(env, start, goal):
+    return a_star_agents.a_star_search(start, goal, env)
+
+
+class AStarBackendTest(unittest.TestCase):
+    """
+    Each backend must return a first action that lies on a shortest path, and ACTION_STAY exactly
+    when the goal is unreachable. Backends break ties between equally short paths differently,
+    so their actions are compared against BFS distances rather than against each other.
+    """
+    def _check_backend(self, backend):
+        for rng, env in _random_envs(seed=0):
+            for _ in range(20):
+                start, goal = rng.sample(env._available_cells, 2)
+                dist = _bfs_distances(env, goal)
+                action = backend(env, start, goal)
+                start_flat = start[0] * env.H + start[1]
+                msg = f"{env.L}x{env.H} walls={sorted(env.walls)} start={start} goal={goal} action={action}"
+                if start_flat not in dist:
+                    self.assertEqual(action, env.ACTION_STAY, msg)
+                    continue
+                dr, dc = env.ACTION_DELTAS[action]
+                r, c = start[0] + dr, start[1] + dc
+                self.assertTrue(0 <= r < env.L and 0 <= c < env.H and (r, c) not in env.walls, msg)
+                self.assertEqual(dist[r * env.H + c], dist[start_flat] - 1, msg)
+
+    def test_python_backend(self):
+        self._check_backend(_python_backend)
+
+    @unittest.skipIf(a_star_agents._astar_numba is None, "numba not installed")
+    def test_numba_backend(self):
+        self._check_backend(_numba_backend)
+
+    @unittest.skipIf(a_star_agents.astar_first_action is None, "astar_core extension not built")
+    def test_cython_backend(self):
+        self._check_backend(_cython_backend)
+
+    def test_dispatch(self):
+        # a_star_search: wall-free rectangle shortcut, memoization, then whichever core is available
+        self._check_backend(_dispatch_backend)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+"""
+BucketPQ ordering: lowest priority first, FIFO within a priority, growth past the initial range.
+Run with `python -m unittest test_bucket_pq` (or pytest) from the repository root.
+"""
+import random
+import unittest
+
+from bucket_pq import BucketPQ
+
+
+class BucketPQTest(unittest.TestCase):
+    def test_pops_in_priority_order_fifo_within_priority(self):
+        rng = random.Random(1)
+        pq = BucketPQ(4) # Small initial range so pushes also exercise growth
+        pushed = [(rng.randint(0, 20), i) for i in range(500)]
+        for f, i in pushed:
+            pq.push(f, i)
+        self.assertEqual(len(pq), len(pushed))
+        popped = [pq.pop() for _ in range(len(pushed))]
+        self.assertEqual(popped, sorted(pushed, key=lambda item: item[0])) # sorted() is stable: FIFO ties
+        self.assertEqual(len(pq), 0)
+        with self.assertRaises(IndexError):
+            pq.pop()
+
+    def test_interleaved_push_pop(self):
+        # A*'s pattern: pushes between pops, mostly at or above the last popped priority, occasionally below
+        rng = random.Random(2)
+        pq = BucketPQ(8)
+        reference = [] # (f, seq) kept sorted; seq preserves FIFO order among equal priorities
+        seq = 0
+        last_f = 0
+        for _ in range(2000):
+            if reference and rng.random() < 0.45:
+                expected_f, expected_seq = reference.pop(0)
+                self.assertEqual(pq.pop(), (expected_f, expected_seq))
+                last_f = expected_f
+            else:
+                f = max(0, last_f + rng.randint(-1, 3))
+                pq.push(f, seq)
+                reference.append((f, seq))
+                reference.sort(key=lambda item: item[0])
+                seq += 1
+        self.assertEqual(len(pq), len(reference))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+EpisodeHistory: the struct-of-arrays log written by every episode runner, and its per-step dict view.
+Run with `python -m unittest test_episode_history` (or pytest) from the repository root.
+"""
+import pickle
+import unittest
+
+import numpy as np
+
+from environment import CooperativeChickenEnv
+from episode_history import EpisodeHistory, FLAG_TERMINATED, FLAG_TRUNCATED
+from random_agents import run_random_agents_episode
+from heuristic_agents import run_heuristic_agents_episode
+from a_star_agents import run_a_star_agents_episode
+
+
+class EpisodeHistoryTest(unittest.TestCase):
+    RUNNERS = (run_random_agents_episode, run_heuristic_agents_episode, run_a_star_agents_episode)
+
+    def _episodes(self):
+        env = CooperativeChickenEnv(L=8, H=8, internal_wall_coords={(2, 2), (2, 3), (5, 5), (6, 1)},
+                                    max_episode_steps=40)
+        for runner in self.RUNNERS:
+            for seed in range(10):
+                env.reset(seed=seed)
+                yield env, runner, runner(env)
+
+    def test_runner_histories(self):
+        for env, runner, (_, _, length, history) in self._episodes():
+            name = runner.__name__
+            self.assertIsInstance(history, EpisodeHistory, name)
+            self.assertIsNone(history[0]['action_taken'], name) # Row 0 is the initial state
+            self.assertTrue(all(history[i]['action_taken'] is not None for i in range(1, len(history))), name)
+            # Only the last row ends the episode, and the final state matches the environment
+            ended = history.flags[:len(history)] & (FLAG_TERMINATED | FLAG_TRUNCATED)
+            self.assertTrue(ended[-1], name)
+            self.assertFalse(ended[:-1].any(), name)
+            last = history[-1]
+            self.assertEqual((last['agent1_pos'], last['agent2_pos'], last['chicken_pos']),
+                             (env.agent1_pos, env.agent2_pos, env.chicken_pos), name)
+            self.assertEqual(last['round_step'], length, name)
+            self.assertEqual((last['L'], last['H'], set(last['walls'])), (env.L, env.H, env.walls), name)
+
+    def test_cumulative_rewards_match_running_totals(self):
+        for _, runner, (r1, r2, _, history) in self._episodes():
+            # Running totals accumulated per step, like the runners used to record them
+            expected = []
+            total1 = total2 = 0
+            for i in range(len(history)):
+                if history.actions[i] >= 0: # Row 0 is the initial state, no action taken
+                    if history.acting_agent[i] == 0:
+                        total1 += history.rewards[i]
+                    else:
+                        total2 += history.rewards[i]
+                expected.append((total1, total2))
+            np.testing.assert_array_equal(history.cumulative_rewards(), np.array(expected, dtype=np.float32),
+                                          err_msg=runner.__name__)
+            last = history[-1]
+            self.assertEqual((last['total_reward_agent1_so_far'], last['total_reward_agent2_so_far']), (r1, r2),
+                             runner.__name__)
+
+    def test_pickle_round_trip_keeps_only_recorded_rows(self):
+        for _, runner, (_, _, _, history) in self._episodes():
+            restored = pickle.loads(pickle.dumps(history))
+            self.assertEqual(len(restored), len(history))
+            self.assertEqual(restored.positions.shape[0], len(history), runner.__name__)
+            self.assertEqual([restored[i] for i in range(len(restored))],
+                             [history[i] for i in range(len(history))], runner.__name__)
+            np.testing.assert_array_equal(restored.cumulative_rewards(), history.cumulative_rewards())
+
+    def test_runners_without_history(self):
+        # Every runner takes the same log_history switch and returns None in place of the history
+        env = CooperativeChickenEnv(L=8, H=8, internal_wall_coords={(2, 2), (2, 3), (5, 5), (6, 1)},
+                                    max_episode_steps=40)
+        for runner in self.RUNNERS:
+            for seed in range(5):
+                env.reset(seed=seed)
+                logged = runner(env)
+                env.reset(seed=seed)
+                unlogged = runner(env, log_history=False)
+                self.assertIsNone(unlogged[3], runner.__name__)
+                self.assertEqual(unlogged[:3], logged[:3], runner.__name__)
+
+    def test_record_and_mark_truncated(self):
+        env = CooperativeChickenEnv(L=4, H=4, max_episode_steps=5)
+        env.reset(seed=0)
+        history = EpisodeHistory(4, env.L, env.H, tuple(env.walls))
+        history.record(env, 0, None, 0, False, False)
+        history.record(env, 0, env.ACTION_STAY, -1, False, False)
+        history.record(env, 1, env.ACTION_NORTH, 99, True, False, grid_render_str="grid")
+        history.mark_truncated()
+        self.assertEqual(len(history), 3)
+        self.assertIsNone(history[0]['action_taken'])
+        self.assertEqual(history[1]['action_taken'], env.ACTION_STAY)
+        self.assertEqual(history[-1]['reward_received'], 99)
+        self.assertEqual(history[-1]['grid_render_str'], "grid")
+        self.assertIsNone(history[0]['grid_render_str'])
+        self.assertEqual((history[-1]['terminated'], history[-1]['truncated']), (True, True))
+        self.assertEqual(history[-1]['agent1_pos'], env.agent1_pos)
+        with self.assertRaises(IndexError):
+            history[3]
+        np.testing.assert_array_equal(history.cumulative_rewards(), [[0, 0], [-1, 0], [-1, 99]])
+
+
+if __name__ == '__main__':
+    unittest.main()
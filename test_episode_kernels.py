@@ -0,0 +1,126 @@
+"""
+Compiled episode kernels against the Python environment and runners they mirror: step_nb against
+CooperativeChickenEnv.step, play_random_episode and run_many against the Python step loops.
+Run with `python -m unittest test_episode_kernels` (or pytest) from the repository root.
+"""
+import random
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import random_agents
+from environment import CooperativeChickenEnv
+from heuristic_agents import run_heuristic_agents_episode
+
+try:
+    from numba import njit
+    import episode_kernels
+except ImportError: # numba not installed
+    episode_kernels = None
+
+
+class _RecordingChoice:
+    """Stands in for env._rng during one step: records the chicken's candidate moves and takes the first."""
+    def __init__(self):
+        self.candidates = None
+
+    def choice(self, seq):
+        self.candidates = list(seq)
+        return seq[0]
+
+def _corridor_envs():
+    """One-cell-wide grids: every chicken move has a single best cell, so no RNG tie-break is ever drawn."""
+    return [CooperativeChickenEnv(L=1, H=12, max_episode_steps=30),
+            CooperativeChickenEnv(L=15, H=1, internal_wall_coords={(11, 0)}, max_episode_steps=30),
+            CooperativeChickenEnv(L=1, H=20, internal_wall_coords={(0, 4), (0, 13)}, max_episode_steps=40)]
+
+def _deltas(env):
+    return np.array([env.ACTION_DELTAS[a] for a in range(env.action_space.n)], dtype=np.int64)
+
+if episode_kernels is not None:
+    @njit(cache=True)
+    def _placement_nb(free_cells, seed):
+        """The initial state run_many draws for an episode seed."""
+        np.random.seed(seed)
+        state = np.empty(episode_kernels.STATE_SIZE, dtype=np.int64)
+        episode_kernels._place_entities_nb(free_cells, state)
+        return state
+
+
+@unittest.skipIf(episode_kernels is None, "numba not installed")
+class EpisodeKernelsTest(unittest.TestCase):
+    def test_step_nb_matches_env_step(self):
+        rng = random.Random(0)
+        for _ in range(150):
+            L, H = rng.randint(1, 9), rng.randint(3, 9)
+            cells = [(r, c) for r in range(L) for c in range(H)]
+            walls = rng.sample(cells, rng.randint(0, max(0, len(cells) - 3) // 3))
+            env = CooperativeChickenEnv(L=L, H=H, internal_wall_coords=walls, max_episode_steps=rng.randint(1, 6))
+            deltas = _deltas(env)
+            for _ in range(40):
+                # Any free cells, agents may share one; the chicken is never under the acting agent
+                a1, a2, chicken = (rng.choice(env._available_cells) for _ in range(3))
+                player = rng.randint(0, 1)
+                if (a1, a2)[player] == chicken:
+                    continue
+                step = rng.randrange(env.max_episode_steps)
+                action = rng.randrange(env.action_space.n)
+
+                env.agent1_pos, env.agent2_pos, env.chicken_pos = a1, a2, chicken
+                env.current_player_idx, env.current_step_in_episode = player, step
+                env._rng = _RecordingChoice()
+                _, reward, terminated, truncated, _ = env.step(action)
+
+                state = np.array([*a1, *a2, *chicken, player, step], dtype=np.int64)
+                nb_reward, nb_terminated, nb_truncated = episode_kernels.step_nb(
+                    env._wall_mask, state, action, deltas, env.max_episode_steps, env.capture_reward,
+                    env.step_penalty, env.collision_penalty)
+
+                msg = f"{L}x{H} walls={sorted(env.walls)} state={(a1, a2, chicken, player, step)} action={action}"
+                self.assertEqual((nb_reward, nb_terminated, nb_truncated), (reward, terminated, truncated), msg)
+                self.assertEqual((tuple(state[0:2]), tuple(state[2:4])), (env.agent1_pos, env.agent2_pos), msg)
+                self.assertEqual(tuple(state[7:8]), (env.current_step_in_episode,), msg)
+                if not terminated:
+                    self.assertEqual(state[6], env.current_player_idx, msg)
+                chicken_moves = env._rng.candidates
+                if chicken_moves is None: # The chicken did not move this step
+                    self.assertEqual(tuple(state[4:6]), chicken, msg)
+                else:
+                    self.assertIn(tuple(state[4:6]), chicken_moves, msg)
+
+    def test_play_random_episode_matches_python_loop(self):
+        for env in _corridor_envs():
+            for seed in range(30):
+                env.reset(seed=seed)
+                compiled = random_agents.run_random_agents_episode(env)
+                with mock.patch.object(random_agents, "play_random_episode", None):
+                    env.reset(seed=seed)
+                    python = random_agents.run_random_agents_episode(env)
+                msg = f"{env.L}x{env.H} seed={seed}"
+                self.assertEqual(compiled[:3], python[:3], msg)
+                self.assertEqual([compiled[3][i] for i in range(len(compiled[3]))],
+                                 [python[3][i] for i in range(len(python[3]))], msg)
+
+    def test_run_many_matches_heuristic_runner(self):
+        for env in _corridor_envs():
+            free_cells = np.array(env._available_cells, dtype=np.int64).reshape(-1, 2)
+            seeds = np.arange(1, 41, dtype=np.int64)
+            r1, r2, lengths, captured = episode_kernels.run_many(
+                env._wall_mask, free_cells, _deltas(env), seeds, episode_kernels.AGENT_HEURISTIC,
+                env.max_episode_steps, env.capture_reward, env.step_penalty, env.collision_penalty)
+            for b, seed in enumerate(seeds):
+                placed = _placement_nb(free_cells, seed)
+                def place(placed=placed):
+                    env.agent1_pos = (int(placed[0]), int(placed[1]))
+                    env.agent2_pos = (int(placed[2]), int(placed[3]))
+                    env.chicken_pos = (int(placed[4]), int(placed[5]))
+                with mock.patch.object(env, "_place_entities", place):
+                    total1, total2, length, history = run_heuristic_agents_episode(env)
+                msg = f"{env.L}x{env.H} seed={seed}"
+                self.assertEqual((r1[b], r2[b], lengths[b]), (total1, total2, length), msg)
+                self.assertEqual(captured[b], history[-1]['terminated'], msg)
+
+
+if __name__ == '__main__':
+    unittest.main()
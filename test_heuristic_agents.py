@@ -0,0 +1,51 @@
+"""
+Heuristic agents: the per-grid-size action table against the per-call argmin it replaced.
+Run with `python -m unittest test_heuristic_agents` (or pytest) from the repository root.
+"""
+import random
+import unittest
+
+import heuristic_agents
+from environment import CooperativeChickenEnv
+from heuristic_agents import choose_heuristic_action
+
+
+def _argmin_action(agent_pos, chicken_pos):
+    """Action whose intended position is closest to the chicken in Manhattan distance, lowest action id on ties."""
+    candidates = []
+    for action_val, (dr, dc) in CooperativeChickenEnv.ACTION_DELTAS.items():
+        dist = abs(agent_pos[0] + dr - chicken_pos[0]) + abs(agent_pos[1] + dc - chicken_pos[1])
+        candidates.append((dist, action_val))
+    return min(candidates)[1]
+
+
+class HeuristicTableTest(unittest.TestCase):
+    def test_every_position_pair_matches_argmin(self):
+        for L, H in ((1, 3), (3, 1), (2, 2), (4, 7), (6, 5)):
+            env = CooperativeChickenEnv(L=L, H=H)
+            cells = [(r, c) for r in range(L) for c in range(H)]
+            for agent_pos in cells:
+                for chicken_pos in cells:
+                    self.assertEqual(choose_heuristic_action(agent_pos, chicken_pos, env),
+                                     _argmin_action(agent_pos, chicken_pos), (L, H, agent_pos, chicken_pos))
+
+    def test_random_positions_on_large_grids(self):
+        rng = random.Random(0)
+        for L, H in ((10, 10), (25, 40), (60, 60)):
+            env = CooperativeChickenEnv(L=L, H=H)
+            for _ in range(2000):
+                agent_pos = (rng.randrange(L), rng.randrange(H))
+                chicken_pos = (rng.randrange(L), rng.randrange(H))
+                self.assertEqual(choose_heuristic_action(agent_pos, chicken_pos, env),
+                                 _argmin_action(agent_pos, chicken_pos), (L, H, agent_pos, chicken_pos))
+
+    def test_table_is_built_once_per_grid_size(self):
+        env_a = CooperativeChickenEnv(L=7, H=9)
+        env_b = CooperativeChickenEnv(L=7, H=9, internal_wall_coords={(3, 3)})
+        table = heuristic_agents._heuristic_cache(env_a)
+        self.assertIs(heuristic_agents._heuristic_cache(env_b), table) # Walls do not change the table
+        self.assertEqual(table.shape, (2 * 7 - 1, 2 * 9 - 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,12 +2,15 @@ import pygame
 import sys
 import os
 import csv
+import functools
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 try:
-    from environment import CooperativeChickenEnv
-    from random_agents import run_random_agents_episode
-    from heuristic_agents import run_heuristic_agents_episode
-    from a_star_agents import run_a_star_agents_episode
+    from experiment_runner import run_experiment_episode
+    from episode_history import FLAG_TERMINATED, FLAG_TRUNCATED
 except ImportError as e:
     print(f"Error importing modules: {e}")
     sys.exit(1)
@@ -38,95 +41,158 @@ TEXT_COLOR = BLACK
 STATUS_SUCCESS_COLOR = (0, 128, 0) # Darker Green for success messages
 STATUS_ERROR_COLOR = RED
 
-# Fonts
-pygame.init() # Initialize Pygame early for font loading
-try:
-    FONT_SMALL = pygame.font.Font(None, 24)
-    FONT_MEDIUM = pygame.font.Font(None, 30)
-    FONT_LARGE = pygame.font.Font(None, 36)
-except Exception as e:
-    print(f"Error loading default font: {e}. Using system font.")
-    FONT_SMALL = pygame.font.SysFont(pygame.font.get_default_font(), 24)
-    FONT_MEDIUM = pygame.font.SysFont(pygame.font.get_default_font(), 30)
-    FONT_LARGE = pygame.font.SysFont(pygame.font.get_default_font(), 36)
+# Fonts, loaded by _init_pygame when the app starts. Experiment workers are spawned processes that
+# re-import this module as __mp_main__, so nothing at module level may initialize pygame.
+FONT_SMALL = None
+FONT_MEDIUM = None
+FONT_LARGE = None
+
+def _init_pygame():
+    """Initializes pygame and loads the fonts; called once by VisualizerApp before any drawing."""
+    global FONT_SMALL, FONT_MEDIUM, FONT_LARGE
+    if FONT_SMALL is not None:
+        return
+    os.environ.setdefault("PYGAME_BLEND_ALPHA_SDL2", "1") # SDL2's SIMD alpha blitter; read by pygame.init
+    pygame.init() # Initialize Pygame before font loading
+    try:
+        FONT_SMALL = pygame.font.Font(None, 24)
+        FONT_MEDIUM = pygame.font.Font(None, 30)
+        FONT_LARGE = pygame.font.Font(None, 36)
+    except Exception as e:
+        print(f"Error loading default font: {e}. Using system font.")
+        FONT_SMALL = pygame.font.SysFont(pygame.font.get_default_font(), 24)
+        FONT_MEDIUM = pygame.font.SysFont(pygame.font.get_default_font(), 30)
+        FONT_LARGE = pygame.font.SysFont(pygame.font.get_default_font(), 36)
 
 
 # --- Predefined Grids ---
 # Updated walls for new grid sizes
-walls_small_10x10 = set([
-    (2,2), (2,3), (2,4), (3,2), (4,2),  # Top-left L-shape
-    (6,6), (6,7), (7,6),                # Mid-right small block
-    (1,8), (2,8),                       # Top-right short vertical
-    (8,1), (8,2),                       # Bottom-left short horizontal
-    (5,5)                               # Central point
-])
-
-walls_medium_25x25 = set()
-# Outer "frame" sections with gaps
-for i in range(3, 22): # L/H = 25
-    if not (10 <= i <= 14): # Create a wide central gap
-        walls_medium_25x25.add((3, i))   # Top
-        walls_medium_25x25.add((21, i))  # Bottom
-        walls_medium_25x25.add((i, 3))   # Left
-        walls_medium_25x25.add((i, 21))  # Right
-# Some internal lines/blocks creating a cross-like pattern
-walls_medium_25x25.update([(x, 12) for x in range(7, 18) if x != 12]) # Vertical line with gap at center
-walls_medium_25x25.update([(12, y) for y in range(7, 18) if y != 12]) # Horizontal line with gap at center
-walls_medium_25x25.update([(7,7), (7,8), (8,7), (8,8)])      # Small top-leftish block
-walls_medium_25x25.update([(16,16), (16,17), (17,16), (17,17)])# Small bottom-rightish block
-walls_medium_25x25.update([(7,16), (7,17), (8,16), (8,17)])      # Small top-rightish block
-walls_medium_25x25.update([(16,7), (16,8), (17,7), (17,8)])# Small bottom-leftish block
-
-walls_large_60x60 = set([(3,x) for x in range(30,55)])  # User's long horizontal line (top-mid-right)
-walls_large_60x60.update([(7,x) for x in range(2,9)])   # User's short horizontal line (top-left)
-walls_large_60x60.update([(x,2) for x in range(3,7)])   # User's short vertical line (top-left)
-walls_large_60x60.update([(x,7) for x in range(3,7)])   # User's another short vertical (top-left)
-walls_large_60x60.update([(4,5), (5,5)])                # User's two points (top-left)
-# Add longer barriers / "zone" dividers
-walls_large_60x60.update([(x, 29) for x in range(10, 50) if not (27 <= x <= 32)]) # Long vertical barrier near mid-left with a gap
-walls_large_60x60.update([(29, y) for y in range(10, 50) if not (27 <= y <= 32)]) # Long horizontal barrier near mid-top with a gap
-# Add some "rooms" or larger blocks (hollow squares with one opening)
-# Room 1 (top-right quadrant)
-for r_idx in range(10, 16): walls_large_60x60.add((r_idx, 40)); walls_large_60x60.add((r_idx, 45))
-for c_idx in range(40, 46): walls_large_60x60.add((10, c_idx)); walls_large_60x60.add((15, c_idx))
-if (12, 40) in walls_large_60x60: walls_large_60x60.remove((12,40)) # Opening
-# Room 2 (bottom-left quadrant)
-for r_idx in range(40, 46): walls_large_60x60.add((r_idx, 10)); walls_large_60x60.add((r_idx, 15))
-for c_idx in range(10, 16): walls_large_60x60.add((40, c_idx)); walls_large_60x60.add((45, c_idx))
-if (40, 12) in walls_large_60x60: walls_large_60x60.remove((40,12)) # Opening
-# A few smaller, scattered obstacles
-walls_large_60x60.update([(20,20), (20,21), (21,20), (21,21)]) # Small 2x2 block
-walls_large_60x60.update([(50,50), (50,51), (51,50), (51,51)]) # Another Small 2x2 block
-walls_large_60x60.update([(15,5), (16,5), (17,5), (15,6)]) # Small L-shape
-walls_large_60x60.update([(5, 45), (5,46), (5,47), (6,47)]) # Small L-shape (mirrored)
-walls_large_60x60.update([(x,x) for x in range(50,55)]) # Diagonal segment
+# Each grid's walls are built by a factory on first selection (see _grid_walls), so importing
+# the module does not pay for grids that are never run.
+def _build_walls_small_10x10():
+    return set([
+        (2,2), (2,3), (2,4), (3,2), (4,2),  # Top-left L-shape
+        (6,6), (6,7), (7,6),                # Mid-right small block
+        (1,8), (2,8),                       # Top-right short vertical
+        (8,1), (8,2),                       # Bottom-left short horizontal
+        (5,5)                               # Central point
+    ])
+
+def _build_walls_medium_25x25():
+    walls = set()
+    # Outer "frame" sections with gaps
+    for i in range(3, 22): # L/H = 25
+        if not (10 <= i <= 14): # Create a wide central gap
+            walls.add((3, i))   # Top
+            walls.add((21, i))  # Bottom
+            walls.add((i, 3))   # Left
+            walls.add((i, 21))  # Right
+    # Some internal lines/blocks creating a cross-like pattern
+    walls.update([(x, 12) for x in range(7, 18) if x != 12]) # Vertical line with gap at center
+    walls.update([(12, y) for y in range(7, 18) if y != 12]) # Horizontal line with gap at center
+    walls.update([(7,7), (7,8), (8,7), (8,8)])      # Small top-leftish block
+    walls.update([(16,16), (16,17), (17,16), (17,17)])# Small bottom-rightish block
+    walls.update([(7,16), (7,17), (8,16), (8,17)])      # Small top-rightish block
+    walls.update([(16,7), (16,8), (17,7), (17,8)])# Small bottom-leftish block
+    return walls
+
+def _build_walls_large_60x60():
+    walls = set([(3,x) for x in range(30,55)])  # User's long horizontal line (top-mid-right)
+    walls.update([(7,x) for x in range(2,9)])   # User's short horizontal line (top-left)
+    walls.update([(x,2) for x in range(3,7)])   # User's short vertical line (top-left)
+    walls.update([(x,7) for x in range(3,7)])   # User's another short vertical (top-left)
+    walls.update([(4,5), (5,5)])                # User's two points (top-left)
+    # Add longer barriers / "zone" dividers
+    walls.update([(x, 29) for x in range(10, 50) if not (27 <= x <= 32)]) # Long vertical barrier near mid-left with a gap
+    walls.update([(29, y) for y in range(10, 50) if not (27 <= y <= 32)]) # Long horizontal barrier near mid-top with a gap
+    # Add some "rooms" or larger blocks (hollow squares with one opening)
+    # Room 1 (top-right quadrant)
+    for r_idx in range(10, 16): walls.add((r_idx, 40)); walls.add((r_idx, 45))
+    for c_idx in range(40, 46): walls.add((10, c_idx)); walls.add((15, c_idx))
+    if (12, 40) in walls: walls.remove((12,40)) # Opening
+    # Room 2 (bottom-left quadrant)
+    for r_idx in range(40, 46): walls.add((r_idx, 10)); walls.add((r_idx, 15))
+    for c_idx in range(10, 16): walls.add((40, c_idx)); walls.add((45, c_idx))
+    if (40, 12) in walls: walls.remove((40,12)) # Opening
+    # A few smaller, scattered obstacles
+    walls.update([(20,20), (20,21), (21,20), (21,21)]) # Small 2x2 block
+    walls.update([(50,50), (50,51), (51,50), (51,51)]) # Another Small 2x2 block
+    walls.update([(15,5), (16,5), (17,5), (15,6)]) # Small L-shape
+    walls.update([(5, 45), (5,46), (5,47), (6,47)]) # Small L-shape (mirrored)
+    walls.update([(x,x) for x in range(50,55)]) # Diagonal segment
+    return walls
 
 PREDEFINED_GRIDS = {
     "Small (10x10)": {
         "L": 10, "H": 10, "max_steps": 100, # Increased max_steps slightly
-        "walls": walls_small_10x10
+        "wall_factory": _build_walls_small_10x10
     },
     "Medium (25x25)": {
         "L": 25, "H": 25, "max_steps": 500,
-        "walls": walls_medium_25x25
+        "wall_factory": _build_walls_medium_25x25
     },
     "Large (60x60)": {
         "L": 60, "H": 60, "max_steps": 2000, # Adjusted max_steps from original 5000
-        "walls": walls_large_60x60
+        "wall_factory": _build_walls_large_60x60
     }
 }
 
+def _grid_walls(grid_params):
+    """Returns a PREDEFINED_GRIDS entry's wall set, building it on first use and memoizing it on the entry."""
+    walls = grid_params.get("walls")
+    if walls is None:
+        walls = grid_params["walls"] = grid_params["wall_factory"]()
+    return walls
+
+def _grid_wall_mask(grid_params):
+    """Returns a PREDEFINED_GRIDS entry's walls as an L x H uint8 mask (1 at walls), memoized like _grid_walls.
+    This is what experiment workers receive: one small buffer to pickle instead of a tuple of coordinates."""
+    wall_mask = grid_params.get("wall_mask")
+    if wall_mask is None:
+        wall_mask = np.zeros((grid_params["L"], grid_params["H"]), dtype=np.uint8)
+        walls = _grid_walls(grid_params)
+        if walls:
+            rows, cols = zip(*walls)
+            wall_mask[list(rows), list(cols)] = 1
+        grid_params["wall_mask"] = wall_mask
+    return wall_mask
+
 # --- Agent Types ---
 AGENT_TYPES = ["Random", "Heuristic", "A*"] # Extend with more agent types as needed
 
+# --- Result Helpers ---
+def _ended_in_capture(history):
+    """Whether an episode's EpisodeHistory ends with the chicken caught."""
+    return bool(history.flags[len(history) - 1] & FLAG_TERMINATED)
+
+# --- Drawing Helpers ---
+def _blit_batch(surface, blit_sequence):
+    """Blits a sequence of (source, dest) pairs in a single call."""
+    if hasattr(surface, "fblits"): # pygame-ce: no per-blit Rect results or argument parsing
+        surface.fblits(blit_sequence)
+    else:
+        surface.blits(blit_sequence, doreturn=False)
+
+@functools.lru_cache(maxsize=32)
+def _get_font(size):
+    """pygame.font.Font(None, size), cached per size: construction loads the font file and builds its glyph cache."""
+    return pygame.font.Font(None, size)
+
+@functools.lru_cache(maxsize=256)
+def _render_text(font, text, color):
+    """font.render(text, True, color), cached: static labels are re-rendered every frame otherwise.
+    Converted to the display format once, so repeated blits skip the per-blit format conversion.
+    Only call after pygame.display.set_mode."""
+    return font.render(text, True, color).convert_alpha()
+
 # --- UI Element Helper ---
 class Button:
-    def __init__(self, x, y, width, height, text, color=BUTTON_COLOR, hover_color=BUTTON_HOVER_COLOR, font=FONT_MEDIUM, text_color=WHITE, selected_color=DARK_GREEN):
+    def __init__(self, x, y, width, height, text, color=BUTTON_COLOR, hover_color=BUTTON_HOVER_COLOR, font=None, text_color=WHITE, selected_color=DARK_GREEN):
         self.rect = pygame.Rect(x, y, width, height)
         self.text = text
         self.color = color
         self.hover_color = hover_color
-        self.font = font
+        self.font = font if font is not None else FONT_MEDIUM # Default resolved once fonts are loaded
         self.text_color = text_color
         self.selected_color = selected_color
         self.is_hovered = False
@@ -140,19 +206,17 @@ class Button:
             current_color = self.hover_color
         
         pygame.draw.rect(surface, current_color, self.rect, border_radius=5)
-        text_surf = self.font.render(self.text, True, self.text_color)
+        text_surf = _render_text(self.font, self.text, self.text_color)
         text_rect = text_surf.get_rect(center=self.rect.center)
         surface.blit(text_surf, text_rect)
 
     def check_hover(self, mouse_pos):
         self.is_hovered = self.rect.collidepoint(mouse_pos)
 
-    def is_clicked(self, event):
-        return event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.rect.collidepoint(event.pos)
-
 # --- Main Application Class ---
 class VisualizerApp:
     def __init__(self):
+        _init_pygame()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("RL Coop Chicken Visualizer")
         self.clock = pygame.time.Clock()
@@ -162,6 +226,8 @@ class VisualizerApp:
         self.selected_grid_key = list(PREDEFINED_GRIDS.keys())[0] 
 
         self.experiment_results = []
+        # One row (r1, r2, length, captured) per result, filled as results arrive, for vectorized metrics
+        self._result_summary = np.zeros((0, 4), dtype=np.int64)
         self.dashboard_metrics = {}
         self.status_message = "" 
 
@@ -169,6 +235,16 @@ class VisualizerApp:
         self.replay_step_index = 0
         self.max_replay_steps = 0
 
+        # Pre-rendered replay grid (cell borders + walls) as ((L, H, cell_size), Surface). Every game of a
+        # run shares one grid, so it only needs rebuilding when a new run starts or the grid changes.
+        self._grid_background = None
+        self._entity_sprites = None # (cell_size, {history key: labeled entity Surface})
+        self._dirty = True # Whether the screen needs redrawing on the next frame
+        self._executor = None # ProcessPoolExecutor for experiment episodes, created on first run
+        self._pending_experiments = [] # Futures of the run in progress
+        self._experiments_done = 0
+        self._last_hover_key = None # (mouse position, screen) of the last hover update
+
         self._init_ui_elements()
 
     def _init_ui_elements(self):
@@ -180,29 +256,40 @@ class VisualizerApp:
         agent_title_surf = FONT_MEDIUM.render("1. Select Agent Type:", True, BLACK)
         self.agent_title_rect = agent_title_surf.get_rect(topleft=(50, y_offset))
         y_offset += 40
+        self.agent_buttons = [] # (agent_type, Button) in display order, for click dispatch and selection state
         for i, agent_type in enumerate(AGENT_TYPES):
             btn = Button(50, y_offset + i * 50, 250, 40, agent_type)
             self.buttons[f"select_agent_{agent_type}"] = btn
+            self.agent_buttons.append((agent_type, btn))
         
         y_offset = 100
         grid_title_surf = FONT_MEDIUM.render("2. Select Grid Configuration:", True, BLACK)
         self.grid_title_rect = grid_title_surf.get_rect(topleft=(350, y_offset))
         y_offset += 40
+        self.grid_buttons = [] # (grid_name, Button), like agent_buttons
         for i, grid_name in enumerate(PREDEFINED_GRIDS.keys()):
             btn = Button(350, y_offset + i * 50, 250, 40, grid_name)
             self.buttons[f"select_grid_{grid_name}"] = btn
+            self.grid_buttons.append((grid_name, btn))
+        # Hit-test lists for Rect.collidelist; they hold the buttons' own Rects, so moved buttons stay in sync
+        self._agent_btn_rects = [btn.rect for _, btn in self.agent_buttons]
+        self._grid_btn_rects = [btn.rect for _, btn in self.grid_buttons]
 
 
         # Dashboard Screen
         self.buttons["back_to_selection"] = Button(20, SCREEN_HEIGHT - 70, 250, 50, "New Experiment Setup")
         self.buttons["export_csv"] = Button(SIDE_PANEL_WIDTH // 2 - 125, SCREEN_HEIGHT - 80, 250, 40, "Export Metrics (CSV)")
         self.game_replay_buttons = [] 
+        self._replay_btn_rects = []
 
         # Replay Screen
         self.buttons["back_to_dashboard"] = Button(SIDE_PANEL_WIDTH + 20, SCREEN_HEIGHT - 70, 220, 50, "Back to Dashboard")
         self.buttons["prev_step"] = Button(GRID_AREA_WIDTH // 2 - 110, SCREEN_HEIGHT - 50, 100, 30, "< Prev")
         self.buttons["next_step"] = Button(GRID_AREA_WIDTH // 2 + 10, SCREEN_HEIGHT - 50, 100, 30, "Next >")
         self.timeline_rect = pygame.Rect(50, SCREEN_HEIGHT - 85, GRID_AREA_WIDTH - 100, 15) # For click detection
+        # Replay screen click targets in dispatch order: back, prev, next, timeline
+        self._replay_control_rects = [self.buttons["back_to_dashboard"].rect, self.buttons["prev_step"].rect,
+                                      self.buttons["next_step"].rect, self.timeline_rect]
         self.agent_title_surf = agent_title_surf # Store pre-rendered surface
         self.grid_title_surf = grid_title_surf   # Store pre-rendered surface
 
@@ -216,79 +303,97 @@ class VisualizerApp:
                 if event.type == pygame.QUIT:
                     running = False
                 self.handle_event(event)
-
-            for button in self.buttons.values():
-                if isinstance(button, Button): button.check_hover(mouse_pos)
-            for button in self.game_replay_buttons:
-                 if isinstance(button, Button): button.check_hover(mouse_pos)
-            
-            self._update_button_selected_states()
-            self.render() # update() is mostly event-driven, render handles drawing current state
+                self._dirty = True # Every state change (clicks, hover, timers, window exposure) arrives as an event
+
+            # Hover only changes when the mouse moves or the buttons do (screen switches regenerate/move them)
+            hover_key = (mouse_pos, self.current_screen)
+            if hover_key != self._last_hover_key:
+                self._last_hover_key = hover_key
+                for button in self.buttons.values():
+                    if isinstance(button, Button): button.check_hover(mouse_pos)
+                for button in self.game_replay_buttons:
+                     if isinstance(button, Button): button.check_hover(mouse_pos)
+                self._dirty = True
+
+            self._poll_experiments()
             
-            pygame.display.flip()
+            if self._dirty: # Nothing animates on its own, so idle frames keep the last picture
+                self._update_button_selected_states()
+                self.render() # update() is mostly event-driven, render handles drawing current state
+
+                pygame.display.flip()
+                self._dirty = False
             self.clock.tick(30) 
 
+        self._drop_executor()
         pygame.quit()
 
+    def _drop_executor(self):
+        """Shuts the worker pool down without waiting for it; the next run creates a fresh one."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
     def _update_button_selected_states(self):
         if self.current_screen == "selection":
-            for agent_type in AGENT_TYPES:
-                self.buttons[f"select_agent_{agent_type}"].is_selected = (self.selected_agent_type == agent_type)
-            for grid_name in PREDEFINED_GRIDS.keys():
-                 self.buttons[f"select_grid_{grid_name}"].is_selected = (self.selected_grid_key == grid_name)
+            for agent_type, btn in self.agent_buttons:
+                btn.is_selected = (self.selected_agent_type == agent_type)
+            for grid_name, btn in self.grid_buttons:
+                btn.is_selected = (self.selected_grid_key == grid_name)
 
 
     def handle_event(self, event):
+        # Every handler below reacts to left clicks only; other events (mostly mouse motion) stop here
+        if not (event.type == pygame.MOUSEBUTTONDOWN and event.button == 1):
+            return
+        pos = event.pos
+        # Each group of targets is hit-tested with one Rect.collidelist call (-1 when nothing is hit)
+        click_rect = pygame.Rect(pos, (1, 1))
+
         if self.current_screen == "selection":
-            if self.buttons["run_experiments"].is_clicked(event):
+            if self.buttons["run_experiments"].rect.collidepoint(pos):
                 self.current_screen = "running_experiments"
                 self.status_message = "Running 10 experiments... please wait."
-                # Force a screen update for the message
-                self.screen.fill(WHITE)
-                status_text_surf = FONT_MEDIUM.render(self.status_message, True, BLACK)
-                self.screen.blit(status_text_surf, status_text_surf.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2)))
-                pygame.display.flip()
-                pygame.time.set_timer(pygame.USEREVENT + 1, 50, True) # Short delay then run
-
-            for agent_type in AGENT_TYPES:
-                if self.buttons[f"select_agent_{agent_type}"].is_clicked(event):
-                    self.selected_agent_type = agent_type
-            for grid_name in PREDEFINED_GRIDS.keys():
-                if self.buttons[f"select_grid_{grid_name}"].is_clicked(event):
-                    self.selected_grid_key = grid_name
+                self._run_experiments_logic() # Returns right away, episodes run in worker processes
+                return
+            hit = click_rect.collidelist(self._agent_btn_rects)
+            if hit != -1:
+                self.selected_agent_type = self.agent_buttons[hit][0]
+                return
+            hit = click_rect.collidelist(self._grid_btn_rects)
+            if hit != -1:
+                self.selected_grid_key = self.grid_buttons[hit][0]
+                return
         
         elif self.current_screen == "dashboard":
-            if self.buttons["back_to_selection"].is_clicked(event):
+            if self.buttons["back_to_selection"].rect.collidepoint(pos):
                 self.current_screen = "selection"
-            for i, btn in enumerate(self.game_replay_buttons):
-                if btn.is_clicked(event):
-                    self.replay_game_index = i
-                    self.replay_step_index = 0
-                    if self.experiment_results and 0 <= i < len(self.experiment_results):
-                        self.max_replay_steps = len(self.experiment_results[i]["history"])
-                    else:
-                        self.max_replay_steps = 0
-                    self.current_screen = "replay"
-                    break
+                return
+            i = click_rect.collidelist(self._replay_btn_rects)
+            if i != -1:
+                self.replay_game_index = i
+                self.replay_step_index = 0
+                if self.experiment_results and 0 <= i < len(self.experiment_results):
+                    self.max_replay_steps = len(self.experiment_results[i]["history"])
+                else:
+                    self.max_replay_steps = 0
+                self.current_screen = "replay"
+                return
         
         elif self.current_screen == "replay":
-            if self.buttons["back_to_dashboard"].is_clicked(event):
+            hit = click_rect.collidelist(self._replay_control_rects)
+            if hit == 0:
                 self.current_screen = "dashboard"
-            if self.buttons["prev_step"].is_clicked(event):
+            elif hit == 1:
                 self.replay_step_index = max(0, self.replay_step_index - 1)
-            if self.buttons["next_step"].is_clicked(event):
+            elif hit == 2:
                 self.replay_step_index = min(self.max_replay_steps -1, self.replay_step_index + 1)
-            
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.timeline_rect.collidepoint(event.pos):
+            elif hit == 3:
                  if self.max_replay_steps > 1: # Avoid division by zero if only one step
-                    progress = (event.pos[0] - self.timeline_rect.x) / self.timeline_rect.width
+                    progress = (pos[0] - self.timeline_rect.x) / self.timeline_rect.width
                     self.replay_step_index = int(progress * (self.max_replay_steps -1)) # -1 because index
                     self.replay_step_index = max(0, min(self.max_replay_steps -1, self.replay_step_index))
 
-        if event.type == pygame.USEREVENT + 1 and self.current_screen == "running_experiments":
-            pygame.time.set_timer(pygame.USEREVENT + 1, 0) # Clear timer
-            self._run_experiments_logic()
-    
     def _export_metrics_to_csv(self):
         if not self.dashboard_metrics or "error" in self.dashboard_metrics or not self.experiment_results:
             self.status_message = "No metrics to export."; print("Export CSV: No metrics to export.")
@@ -303,22 +408,24 @@ class VisualizerApp:
         try:
             with open(filename, 'w', newline='') as csvfile:
                 writer = csv.writer(csvfile)
-                writer.writerow(["Overall Summary Metrics"]); writer.writerow(["Metric", "Value"])
-                writer.writerow(["Agent Type", self.selected_agent_type])
-                writer.writerow(["Grid Configuration", self.selected_grid_key])
-                writer.writerow(["Episodes Run", self.dashboard_metrics.get("num_episodes", "N/A")])
-                writer.writerow(["Avg. Reward Agent 1", f"{self.dashboard_metrics.get('avg_r1', 0):.2f}"])
-                writer.writerow(["Avg. Reward Agent 2", f"{self.dashboard_metrics.get('avg_r2', 0):.2f}"])
-                writer.writerow(["Avg. Episode Length (Rounds)", f"{self.dashboard_metrics.get('avg_len', 0):.2f}"])
-                writer.writerow(["Total Captures", self.dashboard_metrics.get("captures", "N/A")])
-                writer.writerow(["Capture Rate", f"{self.dashboard_metrics.get('capture_rate', 0):.2%}"])
-                writer.writerow([]) 
-                writer.writerow(["Per-Episode Details"])
-                writer.writerow(["Episode No.", "Agent 1 Reward", "Agent 2 Reward", "Length (Rounds)", "Capture Occurred"])
-                for i, res in enumerate(self.experiment_results):
-                    capture_occurred = "No"
-                    if res.get("history") and res["history"][-1].get("terminated", False): capture_occurred = "Yes"
-                    writer.writerow([i + 1, f"{res.get('r1', 0):.2f}", f"{res.get('r2', 0):.2f}", res.get('length', 0), capture_occurred])
+                rows = [
+                    ["Overall Summary Metrics"], ["Metric", "Value"],
+                    ["Agent Type", self.selected_agent_type],
+                    ["Grid Configuration", self.selected_grid_key],
+                    ["Episodes Run", self.dashboard_metrics.get("num_episodes", "N/A")],
+                    ["Avg. Reward Agent 1", f"{self.dashboard_metrics.get('avg_r1', 0):.2f}"],
+                    ["Avg. Reward Agent 2", f"{self.dashboard_metrics.get('avg_r2', 0):.2f}"],
+                    ["Avg. Episode Length (Rounds)", f"{self.dashboard_metrics.get('avg_len', 0):.2f}"],
+                    ["Total Captures", self.dashboard_metrics.get("captures", "N/A")],
+                    ["Capture Rate", f"{self.dashboard_metrics.get('capture_rate', 0):.2%}"],
+                    [],
+                    ["Per-Episode Details"],
+                    ["Episode No.", "Agent 1 Reward", "Agent 2 Reward", "Length (Rounds)", "Capture Occurred"],
+                ]
+                rows.extend([i + 1, f"{res.get('r1', 0):.2f}", f"{res.get('r2', 0):.2f}", res.get('length', 0),
+                             "Yes" if res.get("history") and _ended_in_capture(res["history"]) else "No"]
+                            for i, res in enumerate(self.experiment_results))
+                writer.writerows(rows) # One call instead of a writerow per line
             self.status_message = f"Exported to {filename}"; print(f"Metrics successfully exported to {filename}")
         except IOError as e:
             self.status_message = "Error exporting CSV."; print(f"Error exporting CSV: {e}")
@@ -326,28 +433,61 @@ class VisualizerApp:
 
 
     def _run_experiments_logic(self):
+        """Submits the 10 episodes to the worker pool; _poll_experiments collects them as they finish."""
         grid_params = PREDEFINED_GRIDS[self.selected_grid_key]
         self.experiment_results = []
+        self._grid_background = None # Walls may differ from the previous run's grid
         print(f"Starting experiments: Agent={self.selected_agent_type}, Grid={self.selected_grid_key} (L={grid_params['L']}, H={grid_params['H']}, MaxSteps={grid_params['max_steps']})")
-        for i in range(10):
-            print(f"  Running episode {i+1}/10 for {self.selected_agent_type} agent...") # MODIFIED: Clarified agent type
-            env = CooperativeChickenEnv(L=grid_params["L"], H=grid_params["H"], internal_wall_coords=grid_params["walls"], max_episode_steps=grid_params["max_steps"])
-            
-            r1, r2, length, history = 0, 0, 0, [] # Initialize
-            if self.selected_agent_type == "Random":
-                r1, r2, length, history = run_random_agents_episode(env, render_episode_to_console=False)
-            elif self.selected_agent_type == "Heuristic": # <<< MODIFIED: Added Heuristic agent logic
-                r1, r2, length, history = run_heuristic_agents_episode(env, render_episode_to_console=False)
-            elif self.selected_agent_type == "A*": 
-                r1, r2, length, history = run_a_star_agents_episode(env, render_episode_to_console=False)
-            # TODO: Implement other agent types here in future using elif
-            
-            self.experiment_results.append({"r1": r1, "r2": r2, "length": length, "history": history, "L": env.L, "H": env.H, "walls": list(env.walls)})
+        if self._executor is None:
+            # spawn, not the Linux default fork: forked workers would inherit the initialized pygame
+            # and display state of this process
+            self._executor = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+        wall_mask = _grid_wall_mask(grid_params) # Built once, workers cache their environment per mask
+        self._pending_experiments = [
+            self._executor.submit(run_experiment_episode, self.selected_agent_type, wall_mask, grid_params["max_steps"])
+            for _ in range(10)]
+        self._experiments_done = 0
+
+    def _poll_experiments(self):
+        """Called every frame: updates progress and switches to the dashboard once every episode is back."""
+        if not self._pending_experiments:
+            return
+        done = sum(future.done() for future in self._pending_experiments)
+        if done != self._experiments_done:
+            self._experiments_done = done
+            self.status_message = f"Running 10 experiments... {done}/10 done."
+            self._dirty = True
+        if done < len(self._pending_experiments):
+            return
+
+        grid_params = PREDEFINED_GRIDS[self.selected_grid_key]
+        # Walls as flat cell indices r * H + c, built once per run and shared by every result
+        packed_walls = frozenset(np.flatnonzero(_grid_wall_mask(grid_params)).tolist())
+        futures, self._pending_experiments = self._pending_experiments, []
+        self._result_summary = np.zeros((len(futures), 4), dtype=np.int64)
+        try:
+            for i, future in enumerate(futures):
+                res = future.result()
+                res.update({"L": grid_params["L"], "H": grid_params["H"], "walls": packed_walls})
+                self.experiment_results.append(res)
+                self._result_summary[i] = (res["r1"], res["r2"], res["length"],
+                                           bool(res["history"]) and _ended_in_capture(res["history"]))
+                print(f"  Episode {i+1}/10 for {self.selected_agent_type} agent finished.")
+        except BrokenProcessPool as e: # A worker died (e.g. killed), the pool cannot take new work
+            print(f"Error running experiments, restarting the worker pool: {e}")
+            self._drop_executor()
+            self.experiment_results = []
+            self._result_summary = self._result_summary[:0]
+        except Exception as e: # A worker failed; report it instead of crashing the UI
+            print(f"Error running experiments: {e}")
+            self.experiment_results = []
+            self._result_summary = self._result_summary[:0]
         
         self._calculate_dashboard_metrics()
         self._generate_game_replay_buttons()
         self.current_screen = "dashboard"
         self.status_message = ""
+        self._dirty = True
         print("Experiments finished.")
 
 
@@ -356,23 +496,23 @@ class VisualizerApp:
             self.dashboard_metrics = {"error": "No results to display."}
             return
 
-        num_episodes = len(self.experiment_results)
+        summary = self._result_summary
+        num_episodes = len(summary)
+        avg_r1, avg_r2, avg_len = summary[:, :3].mean(axis=0).tolist()
         self.dashboard_metrics["num_episodes"] = num_episodes
-        self.dashboard_metrics["avg_r1"] = sum(res["r1"] for res in self.experiment_results) / num_episodes
-        self.dashboard_metrics["avg_r2"] = sum(res["r2"] for res in self.experiment_results) / num_episodes
-        self.dashboard_metrics["avg_len"] = sum(res["length"] for res in self.experiment_results) / num_episodes
-        
-        captures = 0
-        for res in self.experiment_results:
-            if res["history"] and res["history"][-1]["terminated"]: # Check last step for termination
-                captures +=1
+        self.dashboard_metrics["avg_r1"] = avg_r1
+        self.dashboard_metrics["avg_r2"] = avg_r2
+        self.dashboard_metrics["avg_len"] = avg_len
+
+        captures = int(np.count_nonzero(summary[:, 3])) # Episodes whose last step terminated
         self.dashboard_metrics["captures"] = captures
         self.dashboard_metrics["capture_rate"] = captures / num_episodes if num_episodes > 0 else 0
-        self.dashboard_metrics["episode_rewards"] = [(res["r1"], res["r2"], res["length"]) for res in self.experiment_results]
+        self.dashboard_metrics["episode_rewards"] = [tuple(row) for row in summary[:, :3].tolist()]
 
 
     def _generate_game_replay_buttons(self):
         self.game_replay_buttons = []
+        self._replay_btn_rects = []
         if not self.experiment_results: return
         
         start_x = SIDE_PANEL_WIDTH + 50
@@ -388,6 +528,7 @@ class VisualizerApp:
             btn_x = start_x + col * (button_w + padding_x)
             btn_y = start_y + row * (button_h + padding_y)
             self.game_replay_buttons.append(Button(btn_x, btn_y, button_w, button_h, btn_text, font=FONT_SMALL))
+        self._replay_btn_rects = [btn.rect for btn in self.game_replay_buttons]
 
 
     def render(self):
@@ -395,7 +536,7 @@ class VisualizerApp:
         if self.current_screen == "selection":
             self.draw_selection_screen()
         elif self.current_screen == "running_experiments":
-            status_text_surf = FONT_MEDIUM.render(self.status_message, True, BLACK)
+            status_text_surf = _render_text(FONT_MEDIUM, self.status_message, BLACK)
             self.screen.blit(status_text_surf, status_text_surf.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2)))
         elif self.current_screen == "dashboard":
             self.draw_dashboard_screen()
@@ -403,20 +544,20 @@ class VisualizerApp:
             self.draw_replay_screen()
         
     def draw_selection_screen(self):
-        title_surf = FONT_LARGE.render("Cooperative Chicken Game - Experiment Setup", True, BLACK)
+        title_surf = _render_text(FONT_LARGE, "Cooperative Chicken Game - Experiment Setup", BLACK)
         self.screen.blit(title_surf, title_surf.get_rect(centerx=SCREEN_WIDTH // 2, y=20))
         self.screen.blit(self.agent_title_surf, self.agent_title_rect)
-        for agent_type in AGENT_TYPES: 
-            self.buttons[f"select_agent_{agent_type}"].draw(self.screen)
+        for _, btn in self.agent_buttons:
+            btn.draw(self.screen)
         self.screen.blit(self.grid_title_surf, self.grid_title_rect)
-        for grid_name in PREDEFINED_GRIDS.keys():
-            self.buttons[f"select_grid_{grid_name}"].draw(self.screen)
+        for _, btn in self.grid_buttons:
+            btn.draw(self.screen)
         self.buttons["run_experiments"].draw(self.screen)
 
     def draw_dashboard_screen(self):
         # Left Panel for Metrics
         pygame.draw.rect(self.screen, LIGHT_GREY, (0, 0, SIDE_PANEL_WIDTH, SCREEN_HEIGHT))
-        title_surf = FONT_LARGE.render("Dashboard", True, BLACK)
+        title_surf = _render_text(FONT_LARGE, "Dashboard", BLACK)
         self.screen.blit(title_surf, title_surf.get_rect(centerx=SIDE_PANEL_WIDTH // 2, y=20))
 
         if self.dashboard_metrics and "error" not in self.dashboard_metrics:
@@ -434,25 +575,25 @@ class VisualizerApp:
                 f"Capture Rate: {self.dashboard_metrics['capture_rate']:.2%}",
             ]
             for i, m_text in enumerate(info_texts):
-                surf = FONT_SMALL.render(m_text, True, BLACK)
+                surf = _render_text(FONT_SMALL, m_text, BLACK)
                 self.screen.blit(surf, (10, metrics_y_start + i * line_height))
             
             current_y = metrics_y_start + len(info_texts) * line_height + 20
-            ep_rewards_title = FONT_MEDIUM.render("Episode Summaries (R1, R2, Len):", True, BLACK)
+            ep_rewards_title = _render_text(FONT_MEDIUM, "Episode Summaries (R1, R2, Len):", BLACK)
             self.screen.blit(ep_rewards_title, (10, current_y))
             current_y += 30
             
             for i, (r1, r2, length) in enumerate(self.dashboard_metrics.get("episode_rewards", [])):
                 ep_sum_text = f"Ep {i+1}: ({r1:.0f}, {r2:.0f}, {length})" # Using .0f for integer-like display
-                surf = FONT_SMALL.render(ep_sum_text, True, BLACK)
+                surf = _render_text(FONT_SMALL, ep_sum_text, BLACK)
                 self.screen.blit(surf, (10, current_y + i* (line_height-5) ))
                 if current_y + i*(line_height-5) > SCREEN_HEIGHT - 80 : break 
         else:
-            err_text = FONT_MEDIUM.render(self.dashboard_metrics.get("error", "No data."), True, RED)
+            err_text = _render_text(FONT_MEDIUM, self.dashboard_metrics.get("error", "No data."), RED)
             self.screen.blit(err_text, (10, 100))
 
         # Right Panel for Game Selection
-        replay_title_surf = FONT_LARGE.render("Select Game to Replay", True, BLACK)
+        replay_title_surf = _render_text(FONT_LARGE, "Select Game to Replay", BLACK)
         self.screen.blit(replay_title_surf, (SIDE_PANEL_WIDTH + 50, 20)) # Adjust x for panel start
         for btn in self.game_replay_buttons:
             btn.draw(self.screen)
@@ -463,10 +604,64 @@ class VisualizerApp:
         if self.status_message: # Display status message
             is_success = "Exported to" in self.status_message or "successfully" in self.status_message
             color = STATUS_SUCCESS_COLOR if is_success else STATUS_ERROR_COLOR
-            status_surf = FONT_SMALL.render(self.status_message, True, color)
+            status_surf = _render_text(FONT_SMALL, self.status_message, color)
             self.screen.blit(status_surf, status_surf.get_rect(centerx=SIDE_PANEL_WIDTH // 2, bottom=SCREEN_HEIGHT - 10))
 
 
+    def _get_grid_background(self, grid_L, grid_H, grid_walls, cell_size):
+        """
+        Returns the static part of the replay grid, drawing it only when the grid or cell size changed.
+        grid_walls holds wall cells as flat indices r * grid_H + c.
+        """
+        key = (grid_L, grid_H, cell_size)
+        if self._grid_background is not None and self._grid_background[0] == key:
+            return self._grid_background[1]
+
+        # Both surfaces start in the display format, so neither the wall blits below nor the per-frame
+        # blit of the background need a format conversion
+        surf = pygame.Surface((grid_H * cell_size, grid_L * cell_size)).convert()
+        surf.fill(WHITE)
+        # One pre-filled wall tile (the cell shrunk by a 1px border) blitted to every wall cell in one batch
+        wall_tile = pygame.Surface((max(cell_size - 2, 0), max(cell_size - 2, 0))).convert()
+        wall_tile.fill(WALL_COLOR)
+        # Grid lines as full-length lines instead of one bordered rect per cell. A 1px cell border covers
+        # the cell's first and last pixel row/column, so each row and column of cells gets two lines.
+        grid_w, grid_h = grid_H * cell_size, grid_L * cell_size
+        for r_idx in range(grid_L):
+            for y in (r_idx * cell_size, r_idx * cell_size + cell_size - 1):
+                pygame.draw.line(surf, GREY, (0, y), (grid_w - 1, y))
+        for c_idx in range(grid_H):
+            for x in (c_idx * cell_size, c_idx * cell_size + cell_size - 1):
+                pygame.draw.line(surf, GREY, (x, 0), (x, grid_h - 1))
+        # Only the wall cells themselves are visited, instead of testing every grid cell for membership
+        wall_blits = []
+        for wall in grid_walls:
+            r_idx, c_idx = divmod(wall, grid_H)
+            wall_blits.append((wall_tile, (c_idx * cell_size + 1, r_idx * cell_size + 1)))
+        _blit_batch(surf, wall_blits)
+        self._grid_background = (key, surf)
+        return surf
+
+    def _get_entity_sprites(self, cell_size):
+        """Returns one labeled cell-sized sprite per entity, rendered once per cell size."""
+        if self._entity_sprites is not None and self._entity_sprites[0] == cell_size:
+            return self._entity_sprites[1]
+
+        entity_radius_ratio = 0.35 # Ratio of cell_size
+        font_size_in_cell = int(cell_size * 0.5)
+        cell_font = _get_font(font_size_in_cell if font_size_in_cell > 10 else 12)
+        sprites = {}
+        for key, color, label_text in (('agent1_pos', AGENT1_COLOR, "1"), ('agent2_pos', AGENT2_COLOR, "2"),
+                                       ('chicken_pos', CHICKEN_COLOR, "C")):
+            sprite = pygame.Surface((cell_size, cell_size), pygame.SRCALPHA).convert_alpha()
+            center = (cell_size // 2, cell_size // 2)
+            pygame.draw.circle(sprite, color, center, int(cell_size * entity_radius_ratio))
+            text_surf = cell_font.render(label_text, True, BLACK)
+            sprite.blit(text_surf, text_surf.get_rect(center=center))
+            sprites[key] = sprite
+        self._entity_sprites = (cell_size, sprites)
+        return sprites
+
     def draw_replay_screen(self):
         # Main Grid Area (Left)
         grid_bg_rect = pygame.Rect(0,0, GRID_AREA_WIDTH, SCREEN_HEIGHT)
@@ -478,7 +673,7 @@ class VisualizerApp:
         
         if self.replay_game_index == -1 or not self.experiment_results or \
            not (0 <= self.replay_game_index < len(self.experiment_results)):
-            err_text = FONT_LARGE.render("Error: No game selected.", True, RED)
+            err_text = _render_text(FONT_LARGE, "Error: No game selected.", RED)
             self.screen.blit(err_text, err_text.get_rect(center=self.screen.get_rect().center))
             # Draw back button even on error
             btn_back_dash = self.buttons.get("back_to_dashboard") # Use .get for safety
@@ -488,17 +683,17 @@ class VisualizerApp:
         game_data = self.experiment_results[self.replay_game_index]
         history = game_data.get("history")
         if not history:
-            err_text = FONT_MEDIUM.render("Error: Selected game has no history.", True, RED)
+            err_text = _render_text(FONT_MEDIUM, "Error: Selected game has no history.", RED)
             self.screen.blit(err_text, (50,50))
             btn_back_dash = self.buttons.get("back_to_dashboard")
             if btn_back_dash: btn_back_dash.draw(self.screen)
             return
 
-        current_step_data = history[self.replay_step_index]
+        step = self.replay_step_index # Row of the EpisodeHistory arrays being shown
         
         grid_L = game_data["L"]
         grid_H = game_data["H"]
-        grid_walls = set(map(tuple, game_data["walls"]))
+        grid_walls = game_data["walls"] # frozenset of flat indices r * H + c
 
         cell_w = (GRID_AREA_WIDTH - 40) // grid_H # -40 for padding
         cell_h = (GRID_AREA_HEIGHT - 40) // grid_L# -40 for padding
@@ -509,66 +704,54 @@ class VisualizerApp:
         grid_offset_x = (GRID_AREA_WIDTH - grid_total_w) // 2
         grid_offset_y = 30 
 
-        for r_idx in range(grid_L):
-            for c_idx in range(grid_H):
-                cell_rect = pygame.Rect(grid_offset_x + c_idx * cell_size, grid_offset_y + r_idx * cell_size, cell_size, cell_size)
-                pygame.draw.rect(self.screen, GREY, cell_rect, 1) 
-                if (r_idx, c_idx) in grid_walls:
-                    pygame.draw.rect(self.screen, WALL_COLOR, cell_rect.inflate(-2,-2)) 
-        
-        entity_radius_ratio = 0.35 # Ratio of cell_size
-        font_size_in_cell = int(cell_size * 0.5)
-        cell_font = pygame.font.Font(None, font_size_in_cell if font_size_in_cell > 10 else 12)
-
-
-        def draw_entity(pos, color, label_text):
-            if pos:
-                center_x = grid_offset_x + pos[1] * cell_size + cell_size // 2
-                center_y = grid_offset_y + pos[0] * cell_size + cell_size // 2
-                pygame.draw.circle(self.screen, color, (center_x, center_y), int(cell_size * entity_radius_ratio))
-                if label_text:
-                    text_surf = cell_font.render(label_text, True, BLACK)
-                    self.screen.blit(text_surf, text_surf.get_rect(center=(center_x, center_y)))
+        self.screen.blit(self._get_grid_background(grid_L, grid_H, grid_walls, cell_size), (grid_offset_x, grid_offset_y))
         
-        draw_entity(current_step_data.get('agent1_pos'), AGENT1_COLOR, "1")
-        draw_entity(current_step_data.get('agent2_pos'), AGENT2_COLOR, "2")
-        draw_entity(current_step_data.get('chicken_pos'), CHICKEN_COLOR, "C")
+        sprites = self._get_entity_sprites(cell_size)
+        entity_blits = []
+        positions = history.positions[step].tolist() # a1_r, a1_c, a2_r, a2_c, c_r, c_c
+        for key, col in (('agent1_pos', 0), ('agent2_pos', 2), ('chicken_pos', 4)): # Drawing order, the chicken ends up on top
+            entity_blits.append((sprites[key], (grid_offset_x + positions[col + 1] * cell_size,
+                                                grid_offset_y + positions[col] * cell_size)))
+        _blit_batch(self.screen, entity_blits)
         
         # --- Info Panel Content (Right) ---
         info_panel_x_start = GRID_AREA_WIDTH + 15
-        title_surf = FONT_MEDIUM.render(f"Replay: Game {self.replay_game_index + 1}", True, BLACK)
+        title_surf = _render_text(FONT_MEDIUM, f"Replay: Game {self.replay_game_index + 1}", BLACK)
         self.screen.blit(title_surf, (info_panel_x_start, 20))
         
         step_info_y = 60
-        step_text_surf = FONT_SMALL.render(f"Step: {self.replay_step_index + 1} / {self.max_replay_steps}", True, BLACK)
+        step_text_surf = _render_text(FONT_SMALL, f"Step: {self.replay_step_index + 1} / {self.max_replay_steps}", BLACK)
         self.screen.blit(step_text_surf, (info_panel_x_start, step_info_y))
         step_info_y += 25
         
-        acting_agent_val = current_step_data.get('acting_agent')
-        acting_agent_str = "N/A"
-        if acting_agent_val is not None:
-            if acting_agent_val == -1 : acting_agent_str = "Initial/End"
-            elif current_step_data.get('action_taken') is None: acting_agent_str = "Initial" # First step has no actor yet
-            else: acting_agent_str = f"Agent {acting_agent_val + 1}"
+        acting_agent_val = int(history.acting_agent[step])
+        action_val = int(history.actions[step]) # -1 where no action was taken (initial state)
+        flags = int(history.flags[step])
+        total_r1, total_r2 = history.cumulative_rewards()[step].tolist()
+        if acting_agent_val == -1 : acting_agent_str = "Initial/End"
+        elif action_val < 0: acting_agent_str = "Initial" # First step has no actor yet
+        else: acting_agent_str = f"Agent {acting_agent_val + 1}"
 
 
         details_to_display = [
-            f"Round No: {current_step_data.get('round_step', 'N/A')}",
+            f"Round No: {history.round_step[step]}",
             f"Current Turn: {acting_agent_str}",
-            f"Action Taken: {current_step_data.get('action_taken', 'N/A')}",
-            f"Reward This Step: {current_step_data.get('reward_received', 'N/A'):.1f}",
-            f"A1 Total Reward: {current_step_data.get('total_reward_agent1_so_far', 'N/A'):.1f}",
-            f"A2 Total Reward: {current_step_data.get('total_reward_agent2_so_far', 'N/A'):.1f}",
-            f"Terminated: {current_step_data.get('terminated', 'N/A')}",
-            f"Truncated: {current_step_data.get('truncated', 'N/A')}",
+            f"Action Taken: {action_val if action_val >= 0 else None}",
+            f"Reward This Step: {history.rewards[step]:.1f}",
+            f"A1 Total Reward: {total_r1:.1f}",
+            f"A2 Total Reward: {total_r2:.1f}",
+            f"Terminated: {bool(flags & FLAG_TERMINATED)}",
+            f"Truncated: {bool(flags & FLAG_TRUNCATED)}",
         ]
+        # Cached too: stepping back and forth through a replay redraws the same few lines over and over
         for i, d_text in enumerate(details_to_display):
-            surf = FONT_SMALL.render(d_text, True, BLACK)
+            surf = _render_text(FONT_SMALL, d_text, BLACK)
             self.screen.blit(surf, (info_panel_x_start, step_info_y + i * 20))
         
         # --- Timeline & Controls (Bottom of Grid Area) ---
         timeline_base_y = SCREEN_HEIGHT - 90
-        self.timeline_rect = pygame.Rect(50, timeline_base_y , GRID_AREA_WIDTH - 100, 15) # Update rect for correct pos
+        # Updated in place: _replay_control_rects holds this Rect object for click hit-tests
+        self.timeline_rect.update(50, timeline_base_y, GRID_AREA_WIDTH - 100, 15)
         pygame.draw.rect(self.screen, GREY, self.timeline_rect, border_radius=3)
         if self.max_replay_steps > 1:
             progress_percent = self.replay_step_index / (self.max_replay_steps -1)
@@ -587,7 +770,7 @@ class VisualizerApp:
 
 
 if __name__ == '__main__':
-    required_files = ["environment.py", "random_agents.py", "heuristic_agents.py", "a_star_agents.py"] # Ensure these files are in the same directory
+    required_files = ["environment.py", "random_agents.py", "heuristic_agents.py", "a_star_agents.py", "experiment_runner.py"] # Ensure these files are in the same directory
     missing_files = [f for f in required_files if not os.path.exists(f)]
     if missing_files:
         for f_name in missing_files: